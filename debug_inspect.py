@@ -0,0 +1,38 @@
+# debug_inspect.py
+
+import pyarrow.compute as pc
+import pyarrow.parquet as pq
+
+PATHS = [
+    "data/processed/laps.parquet",
+    "data/processed/sectors.parquet",
+    "data/processed/lap_start.parquet",
+    "data/processed/lap_end.parquet",
+]
+
+
+def inspect(path, n=5):
+    """
+    Print schema (incl. timestamp dtypes), row count, per-track row counts
+    and a head sample. Uses parquet metadata + the first batch only, so the
+    file is never fully decoded.
+    """
+    pf = pq.ParquetFile(path)
+
+    print(f"\n===== {path} =====")
+    print(pf.schema_arrow)
+    print("\nRows:", pf.metadata.num_rows)
+
+    if "track" in pf.schema_arrow.names:
+        tracks = pf.read(columns=["track"]).column("track")
+        for entry in pc.value_counts(tracks).to_pylist():
+            print(f"  {entry['values']}: {entry['counts']} rows")
+
+    head = next(pf.iter_batches(batch_size=n), None)
+    print("\nSample rows:")
+    print(head.to_pandas() if head is not None else "(empty)")
+
+
+if __name__ == "__main__":
+    for path in PATHS:
+        inspect(path)
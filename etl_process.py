@@ -7,6 +7,7 @@ if __name__ == "__main__":
 
     loader = GRDataLoader()
     data = loader.load_all_tracks()
+    data["sector_summary"] = loader.build_sector_summary(data["sectors"])
     loader.save_parquet(data)
 
     print("\n✅ ETL Completed Successfully!")
@@ -1,8 +1,27 @@
 # models/lap_time_features.py
 
+import numpy as np
 import pandas as pd
 
 
+def _stint_key(df: pd.DataFrame) -> np.ndarray:
+    """
+    Composite (track, vehicle_id, outing) group code as a single array.
+    Rows with a missing key part get NaN so groupby drops them, as it
+    does for the multi-column key.
+    """
+    key = np.zeros(len(df), dtype=np.int64)
+    missing = np.zeros(len(df), dtype=bool)
+    for col in ["track", "vehicle_id", "outing"]:
+        codes, uniques = pd.factorize(df[col])
+        key = key * max(len(uniques), 1) + codes
+        missing |= codes < 0
+
+    if missing.any():
+        return np.where(missing, np.nan, key)
+    return key
+
+
 def prepare_lap_features(laps_df: pd.DataFrame) -> pd.DataFrame:
     """
     Build a training-ready table from laps_real.parquet.
@@ -16,51 +35,61 @@ def prepare_lap_features(laps_df: pd.DataFrame) -> pd.DataFrame:
       - start_time
       - end_time
     """
-    df = laps_df.copy()
-
-    # Ensure types
-    df["lap"] = pd.to_numeric(df["lap"], errors="coerce")
-    df["lap_time_s"] = pd.to_numeric(df["lap_time_s"], errors="coerce")
-    df = df.dropna(subset=["lap", "lap_time_s"])
-    df["lap"] = df["lap"].astype(int)
+    # Ensure types; keep only rows with a usable lap + lap time
+    lap = pd.to_numeric(laps_df["lap"], errors="coerce")
+    lap_time = pd.to_numeric(laps_df["lap_time_s"], errors="coerce")
+    valid = lap.notna() & lap_time.notna()
+
+    # Sort to get proper temporal order (single copy of the valid rows)
+    df = (
+        laps_df.loc[valid]
+        .assign(lap=lap[valid], lap_time_s=lap_time[valid])
+        .sort_values(["track", "vehicle_id", "outing", "lap"])
+    )
 
-    # Sort to get proper temporal order
-    df = df.sort_values(["track", "vehicle_id", "outing", "lap"])
+    # One grouping per (track, vehicle, outing) stint, reused by every
+    # window feature; rows are already in key order so skip the re-sort.
+    # The three keys are collapsed into one int64 code so they are hashed
+    # once here instead of once per groupby operation.
+    stints = df.groupby(_stint_key(df), sort=False)
 
     # Stint lap index: within each (track, vehicle, outing)
-    df["stint_lap_idx"] = (
-        df.groupby(["track", "vehicle_id", "outing"])
-        .cumcount()
-        .astype(int)
-    )
+    df["stint_lap_idx"] = stints.cumcount()
 
-    # Previous lap time within the same stint
-    df["prev_lap_time_s"] = (
-        df.groupby(["track", "vehicle_id", "outing"])["lap_time_s"]
-        .shift(1)
-    )
+    # Previous lap times within the same stint
+    stint_laps = stints["lap_time_s"]
+    lag1 = stint_laps.shift(1)
+    lag2 = stint_laps.shift(2)
+    df["prev_lap_time_s"] = lag1
 
     # Rolling 3-lap avg as simple "pace" signal
-    df["rolling_3_lap_time_s"] = (
-        df.groupby(["track", "vehicle_id", "outing"])["lap_time_s"]
-        .rolling(window=3, min_periods=1)
-        .mean()
-        .reset_index(level=[0, 1, 2], drop=True)
+    # (current + two previous laps, averaging over whichever exist)
+    lap_count = (
+        df["lap_time_s"].notna().astype("int8")
+        + lag1.notna()
+        + lag2.notna()
     )
+    df["rolling_3_lap_time_s"] = (
+        df["lap_time_s"].fillna(0) + lag1.fillna(0) + lag2.fillna(0)
+    ) / lap_count
 
-    # Drop rows where prev_lap_time_s is NaN (first lap of stint)
-    df = df.dropna(subset=["prev_lap_time_s"])
-
-    # Cast to numeric
-    df["prev_lap_time_s"] = df["prev_lap_time_s"].astype(float)
-    df["rolling_3_lap_time_s"] = df["rolling_3_lap_time_s"].astype(float)
-
-    return df
+    # Drop rows where prev_lap_time_s is NaN (first lap of stint) and
+    # narrow dtypes in the same pass: lap counters fit int16, times float32
+    return df.loc[df["prev_lap_time_s"].notna()].astype({
+        "lap": np.int16,
+        "stint_lap_idx": np.int16,
+        "lap_time_s": np.float32,
+        "prev_lap_time_s": np.float32,
+        "rolling_3_lap_time_s": np.float32,
+    })
 
 
 def get_feature_target_split(df: pd.DataFrame):
     """
-    Given prepared features, return X, y and list of feature columns.
+    Given prepared features, return X (dense float32), y, list of feature
+    columns and the vehicle_id categories (code i -> categories[i]).
+    vehicle_id is the last column, integer-coded, to be flagged as a
+    categorical feature by the model (no one-hot block).
     """
     feature_cols = [
         "lap",               # absolute lap
@@ -69,17 +98,11 @@ def get_feature_target_split(df: pd.DataFrame):
         "rolling_3_lap_time_s",
     ]
 
-    # One-hot encode vehicle_id (global across tracks)
-    df = df.copy()
-    df["vehicle_id"] = df["vehicle_id"].astype(str)
-    df_oh = pd.get_dummies(df, columns=["vehicle_id"], prefix="veh")
-
-    feature_cols_extended = feature_cols + [
-        c for c in df_oh.columns
-        if c.startswith("veh_")
-    ]
+    codes, categories = pd.factorize(df["vehicle_id"].astype(str), sort=True)
 
-    X = df_oh[feature_cols_extended]
-    y = df_oh["lap_time_s"].astype(float)
+    X = np.empty((len(df), len(feature_cols) + 1), dtype=np.float32)
+    X[:, :-1] = df[feature_cols].to_numpy(dtype=np.float32)
+    X[:, -1] = np.where(codes < 0, np.nan, codes)
+    y = df["lap_time_s"].astype(float)
 
-    return X, y, feature_cols_extended
+    return X, y, feature_cols + ["vehicle_id"], list(categories)
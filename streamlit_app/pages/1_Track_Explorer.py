@@ -3,9 +3,9 @@ import streamlit as st
 import pandas as pd
 import numpy as np
 import plotly.express as px
+import plotly.io as pio
 
-from utils.data_loader import DataLoader
-from utils.track_meta import TrackMeta
+from utils.data_loader import load_track_data, load_track_meta
 from utils.charts import lap_time_chart
 
 from utils.theme import apply_toyota_theme
@@ -80,6 +80,50 @@ def toyota_card(title, value):
     )
 
 
+# ---------------------------------------------------------
+# Cached figures (built once per track, reused as JSON)
+# ---------------------------------------------------------
+@st.cache_data(show_spinner=False)
+def lap_time_fig_json(track):
+    fig = lap_time_chart(load_track_data(track, "laps"), track)
+    fig.update_layout(
+        paper_bgcolor=WHITE,
+        plot_bgcolor=WHITE,
+        font=dict(color=BLACK),
+    )
+    return fig.to_json()
+
+
+@st.cache_data(show_spinner=False)
+def driver_spread_fig_json(track, laptime_col):
+    track_laps = load_track_data(track, "laps")
+
+    # float car numbers (e.g. 13.0) → "13" via nullable int,
+    # anything non-numeric keeps its text minus a trailing ".0"
+    veh_num = pd.to_numeric(track_laps["vehicle_number"], errors="coerce")
+    veh_str = veh_num.round().astype("Int64").astype("string")
+    if veh_str.isna().any():
+        veh_str = veh_str.fillna(
+            track_laps["vehicle_number"].astype(str).str.removesuffix(".0")
+        )
+    track_laps["vehicle_number_str"] = veh_str
+
+    fig = px.box(
+        track_laps,
+        x="vehicle_number_str",
+        y=laptime_col,
+        color="vehicle_number_str",
+        title=f"Lap Time Distribution by Driver – {track}",
+    )
+    fig.update_layout(
+        paper_bgcolor=WHITE,
+        plot_bgcolor=WHITE,
+        font=dict(color=BLACK),
+        showlegend=False,
+    )
+    return fig.to_json()
+
+
 # ---------------------------------------------------------
 # Load Data
 # ---------------------------------------------------------
@@ -88,17 +132,13 @@ st.markdown(
     unsafe_allow_html=True,
 )
 
-loader = DataLoader()
-data = loader.load_all()
-meta = TrackMeta(loader.load_track_metadata())
-
-laps = data.get("laps", pd.DataFrame())
-sectors = data.get("sectors", pd.DataFrame())
-weather = data.get("weather", pd.DataFrame())
-results = data.get("results", pd.DataFrame())
+meta = load_track_meta()
 
 track = st.selectbox("Select Track", meta.get_tracks())
 
+# Only the selected track's rows are read from each parquet file
+laps = load_track_data(track, "laps")
+
 # ---------------------------------------------------------
 # 1. LAP TIMING OVERVIEW
 # ---------------------------------------------------------
@@ -108,13 +148,7 @@ if laps.empty:
     st.warning("No lap data available.")
 else:
     toyota_tag("Lap Times Scatter Plot")
-    fig = lap_time_chart(laps, track)
-    fig.update_layout(
-        paper_bgcolor=WHITE,
-        plot_bgcolor=WHITE,
-        font=dict(color=BLACK),
-    )
-    st.plotly_chart(fig, use_container_width=True)
+    st.plotly_chart(pio.from_json(lap_time_fig_json(track)), use_container_width=True)
 
 
 # ---------------------------------------------------------
@@ -122,7 +156,7 @@ else:
 # ---------------------------------------------------------
 toyota_section_header("Lap Time Spread by Driver")
 
-track_laps = laps[laps["track"] == track].copy()
+track_laps = laps
 
 if not track_laps.empty:
     if "vehicle_number" in track_laps.columns:
@@ -134,24 +168,7 @@ if not track_laps.empty:
                 break
 
         if laptime_col:
-            track_laps["vehicle_number_str"] = (
-                track_laps["vehicle_number"].astype(str)
-                .str.replace(".0$", "", regex=True)
-            )
-
-            fig2 = px.box(
-                track_laps,
-                x="vehicle_number_str",
-                y=laptime_col,
-                color="vehicle_number_str",
-                title=f"Lap Time Distribution by Driver – {track}",
-            )
-            fig2.update_layout(
-                paper_bgcolor=WHITE,
-                plot_bgcolor=WHITE,
-                font=dict(color=BLACK),
-                showlegend=False,
-            )
+            fig2 = pio.from_json(driver_spread_fig_json(track, laptime_col))
             st.plotly_chart(fig2, use_container_width=True)
         else:
             st.info("Unable to detect lap time column.")
@@ -167,18 +184,29 @@ else:
 toyota_section_header("Sector Performance Summary")
 
 sec_cols = ["s1_seconds", "s2_seconds", "s3_seconds"]
-track_sec = sectors[sectors["track"] == track].copy()
-
-if not track_sec.empty and all(col in track_sec.columns for col in sec_cols):
-    for col in sec_cols:
-        track_sec[col] = pd.to_numeric(track_sec[col], errors="coerce")
 
-    summary = track_sec[sec_cols].describe().T[["mean", "min", "max"]].round(3)
-    summary.index = ["Sector 1", "Sector 2", "Sector 3"]
+# Precomputed by etl_process.py; None (cached) while the summary file
+# hasn't been published yet, in which case the raw sectors are used
+summary = load_track_data(track, "sector_summary")
 
-    st.dataframe(summary, use_container_width=True)
+if summary is not None and not summary.empty:
+    st.dataframe(
+        summary.set_index("sector")[["mean", "min", "max"]].rename_axis(None),
+        use_container_width=True,
+    )
 else:
-    st.info("Sector columns missing for this track.")
+    track_sec = load_track_data(track, "sectors")
+
+    if not track_sec.empty and all(col in track_sec.columns for col in sec_cols):
+        for col in sec_cols:
+            track_sec[col] = pd.to_numeric(track_sec[col], errors="coerce")
+
+        summary = track_sec[sec_cols].describe().T[["mean", "min", "max"]].round(3)
+        summary.index = ["Sector 1", "Sector 2", "Sector 3"]
+
+        st.dataframe(summary, use_container_width=True)
+    else:
+        st.info("Sector columns missing for this track.")
 
 
 # ---------------------------------------------------------
@@ -186,7 +214,7 @@ else:
 # ---------------------------------------------------------
 toyota_section_header("Weather Snapshot")
 
-track_weather = weather[weather["track"] == track].copy()
+track_weather = load_track_data(track, "weather")
 
 if track_weather.empty:
     st.info("Weather data not found for this track.")
@@ -213,7 +241,7 @@ else:
 # ---------------------------------------------------------
 toyota_section_header("Driver Leaderboard")
 
-track_results = results[results["track"] == track].copy()
+track_results = load_track_data(track, "results")
 
 if track_results.empty:
     st.info("No classification results for this track.")
@@ -223,7 +251,10 @@ else:
     # Ranking logic
     if "position" in track_results.columns:
         track_results["pos_rank"] = pd.to_numeric(track_results["position"], errors="coerce")
-        track_results = track_results.sort_values("pos_rank")
+        # Stable argsort on the raw float array; NaN ranks sort last,
+        # same as sort_values
+        order = np.argsort(track_results["pos_rank"].to_numpy(dtype=float), kind="stable")
+        track_results = track_results.iloc[order]
     else:
         track_results["pos_rank"] = np.arange(1, len(track_results) + 1)
 
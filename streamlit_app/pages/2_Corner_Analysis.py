@@ -6,8 +6,7 @@ import numpy as np
 import plotly.express as px
 import plotly.graph_objects as go
 
-from utils.data_loader import DataLoader
-from utils.track_meta import TrackMeta
+from utils.data_loader import load_track_meta
 from utils.charts import corner_speed_plot
 
 from utils.theme import apply_toyota_theme
@@ -73,8 +72,7 @@ st.markdown(
 # ---------------------------------------------------------
 # Load Data
 # ---------------------------------------------------------
-loader = DataLoader()
-meta = TrackMeta(loader.load_track_metadata())
+meta = load_track_meta()
 
 track = st.selectbox("Select Track", meta.get_tracks())
 
@@ -96,6 +94,11 @@ for col in ["min_speed", "max_lateral_g", "entry_speed", "exit_speed"]:
 
 corners_df["corner_number"] = corners_df.index + 1
 
+# Contiguous float32 views of the two fields the heuristics use
+min_speed = corners_df["min_speed"].to_numpy(dtype=np.float32, na_value=np.nan)
+lat_g = corners_df["max_lateral_g"].to_numpy(dtype=np.float32, na_value=np.nan)
+corner_labels = corners_df["corner_number"].astype(str).to_numpy()
+
 
 # ---------------------------------------------------------
 # 1 — Overview Metrics
@@ -135,19 +138,17 @@ st.plotly_chart(fig, use_container_width=True)
 # ---------------------------------------------------------
 toyota_section("Corner Difficulty Score")
 
-# Heuristic difficulty model
-corners_df["difficulty"] = (
-    (corners_df["max_lateral_g"] * 2.5)
-    + (100 - corners_df["min_speed"]) * 0.1
-)
+# Heuristic difficulty model (computed on the float32 views; stored as
+# rounded float64 so the table and hovers don't show float32 noise)
+difficulty = (lat_g * 2.5 + (100.0 - min_speed) * 0.1).astype(np.float64).round(4)
+corners_df["difficulty"] = difficulty
 
 difficulty_fig = px.bar(
-    corners_df,
-    x="corner_number",
-    y="difficulty",
-    labels={"corner_number": "Corner", "difficulty": "Difficulty Score"},
+    x=corners_df["corner_number"].to_numpy(),
+    y=difficulty,
+    color=difficulty,
+    labels={"x": "Corner", "y": "Difficulty Score", "color": "Difficulty Score"},
     title="Corner Difficulty Ranking",
-    color="difficulty",
     color_continuous_scale=[TOYOTA_GRAY, TOYOTA_RED],
 )
 difficulty_fig.update_layout(
@@ -164,8 +165,9 @@ st.plotly_chart(difficulty_fig, use_container_width=True)
 toyota_section("Entry vs Exit Speed")
 
 if "entry_speed" in corners_df.columns and "exit_speed" in corners_df.columns:
-    delta_df = corners_df.copy()
-    delta_df["speed_gain"] = delta_df["exit_speed"] - delta_df["entry_speed"]
+    delta_df = corners_df.assign(
+        speed_gain=corners_df["exit_speed"] - corners_df["entry_speed"]
+    )
 
     fig3 = px.bar(
         delta_df,
@@ -191,23 +193,24 @@ else:
 # ---------------------------------------------------------
 toyota_section("Corner Profile Radar")
 
-radar_df = corners_df[["corner_number", "min_speed", "max_lateral_g"]].copy()
-radar_df["min_speed_norm"] = radar_df["min_speed"] / radar_df["min_speed"].max()
-radar_df["g_norm"] = radar_df["max_lateral_g"] / radar_df["max_lateral_g"].max()
+# nanmax matches pandas' skipna max when a corner is missing a value
+# (rounded float64 for the hover labels, as with difficulty)
+min_speed_norm = (min_speed / np.nanmax(min_speed)).astype(np.float64).round(4)
+g_norm = (lat_g / np.nanmax(lat_g)).astype(np.float64).round(4)
 
 radar_fig = go.Figure()
 
 radar_fig.add_trace(go.Scatterpolar(
-    r=radar_df["min_speed_norm"],
-    theta=radar_df["corner_number"].astype(str),
+    r=min_speed_norm,
+    theta=corner_labels,
     fill='toself',
     name="Apex Speed",
     line=dict(color=TOYOTA_RED),
 ))
 
 radar_fig.add_trace(go.Scatterpolar(
-    r=radar_df["g_norm"],
-    theta=radar_df["corner_number"].astype(str),
+    r=g_norm,
+    theta=corner_labels,
     fill='toself',
     name="Lateral G",
     line=dict(color=TOYOTA_GRAY),
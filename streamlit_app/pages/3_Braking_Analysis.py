@@ -6,8 +6,7 @@ import numpy as np
 import plotly.express as px
 import plotly.graph_objects as go
 
-from utils.data_loader import DataLoader
-from utils.track_meta import TrackMeta
+from utils.data_loader import load_sectors, load_track_meta
 from utils.theme import apply_toyota_theme
 
 # Apply Toyota theme
@@ -78,69 +77,95 @@ toyota_title("Toyota GR — Braking Analysis")
 # -------------------------------------------------------
 # Load Sector Data
 # -------------------------------------------------------
-loader = DataLoader()
-meta = TrackMeta(loader.load_track_metadata())
-sectors = loader.load_all()["sectors"]
+meta = load_track_meta()
 
-if sectors.empty:
-    st.error("No sector data found. Please run ETL again.")
-    st.stop()
+SECTOR_COLS = (
+    "vehicle_number", "lap", "s1_seconds", "s2_seconds",
+    "s3_seconds", "lap_improvement", "speed_kph",
+)
 
 
 # -------------------------------------------------------
-# Track Selection
+# Braking Metrics
 # -------------------------------------------------------
-track = st.selectbox("Select Track", meta.get_tracks())
-df = sectors[sectors["track"] == track].copy()
+@st.cache_data(show_spinner=False)
+def _braking_metrics(track):
+    """
+    Cast a track's sector rows and derive speed drop + braking score.
+    Depends only on the track, so reruns reuse the cached frame.
+    """
+    df = load_sectors(track, SECTOR_COLS)
+
+    # Clean casting
+    # Car numbers stay integer (Int32) so the per-car groupby hashes ints;
+    # they are only stringified for the driver chart axis
+    df["vehicle_number"] = (
+        pd.to_numeric(df["vehicle_number"], errors="coerce").round().astype("Int32")
+    )
+    num_cols = ["lap", "s1_seconds", "s2_seconds", "s3_seconds", "speed_kph", "lap_improvement"]
+    df[num_cols] = df[num_cols].apply(pd.to_numeric, errors="coerce")
 
-if df.empty:
-    st.error(f"No sector data available for track: {track}")
-    st.stop()
+    df = df.dropna(subset=["lap"])
 
+    # Sector variability — braking indicator
+    # (one nansum over the (N, 3) sector block; missing sectors count as 0)
+    df["sector_variability"] = np.nansum(
+        df[["s1_seconds", "s2_seconds", "s3_seconds"]].to_numpy(dtype=float), axis=1
+    )
+
+    # Speed drop = braking event indicator
+    df = df.sort_values(["vehicle_number", "lap"])
+    # dropna=False: laps without a car number form their own group, as the
+    # old string "nan" key did, instead of getting NaN (→ 0) drops
+    df["speed_drop"] = -df.groupby(
+        "vehicle_number", sort=False, observed=True, dropna=False
+    )["speed_kph"].diff()
+    df["speed_drop"] = df["speed_drop"].clip(lower=0).fillna(0)
+
+    # Braking Score
+    df["braking_score"] = (
+        df["sector_variability"] * 0.6 +
+        df["speed_drop"] * 0.4 +
+        df["lap_improvement"].abs() * 0.1
+    )
+    df["braking_score"] = df["braking_score"].fillna(0)
+    return df
 
-# -------------------------------------------------------
-# Required Columns
-# -------------------------------------------------------
-required_cols = [
-    "vehicle_number", "lap", "s1_seconds", "s2_seconds",
-    "s3_seconds", "lap_improvement", "speed_kph"
-]
 
-# Clean casting
-df["vehicle_number"] = df["vehicle_number"].astype(str)
-df["lap"] = pd.to_numeric(df["lap"], errors="coerce")
-df["s1_seconds"] = pd.to_numeric(df["s1_seconds"], errors="coerce")
-df["s2_seconds"] = pd.to_numeric(df["s2_seconds"], errors="coerce")
-df["s3_seconds"] = pd.to_numeric(df["s3_seconds"], errors="coerce")
-df["speed_kph"] = pd.to_numeric(df["speed_kph"], errors="coerce")
-df["lap_improvement"] = pd.to_numeric(df["lap_improvement"], errors="coerce")
+@st.cache_data(show_spinner=False)
+def _preview(track):
+    """First 300 rows of the braking frame for the raw-data table."""
+    return _braking_metrics(track).head(300).reset_index(drop=True)
 
-df = df.dropna(subset=["lap"])
+
+@st.cache_data(show_spinner=False)
+def driver_braking_scores(track):
+    """Mean braking score per car, highest first (depends only on track)."""
+    df = _braking_metrics(track)
+    driver_brake = (
+        df.groupby("vehicle_number", sort=False, observed=True, dropna=False)["braking_score"]
+        .mean()
+        .reset_index()
+        .sort_values("braking_score", ascending=False)
+    )
+    # Car-less laps keep their "nan" bar, as with the old string keys
+    driver_brake["vehicle_number"] = (
+        driver_brake["vehicle_number"].astype(str).replace("<NA>", "nan")
+    )
+    return driver_brake
 
 
 # -------------------------------------------------------
-# Braking Metrics
+# Track Selection
 # -------------------------------------------------------
+track = st.selectbox("Select Track", meta.get_tracks())
+df = load_sectors(track, SECTOR_COLS)
 
-# Sector variability — braking indicator
-df["sector_variability"] = (
-    df["s1_seconds"].fillna(0) +
-    df["s2_seconds"].fillna(0) +
-    df["s3_seconds"].fillna(0)
-)
-
-# Speed drop = braking event indicator
-df = df.sort_values(["vehicle_number", "lap"])
-df["speed_drop"] = df.groupby("vehicle_number")["speed_kph"].diff() * -1
-df["speed_drop"] = df["speed_drop"].clip(lower=0).fillna(0)
+if df.empty:
+    st.error(f"No sector data available for track: {track}")
+    st.stop()
 
-# Braking Score
-df["braking_score"] = (
-    df["sector_variability"] * 0.6 +
-    df["speed_drop"] * 0.4 +
-    df["lap_improvement"].abs() * 0.1
-)
-df["braking_score"] = df["braking_score"].fillna(0)
+df = _braking_metrics(track)
 
 
 # -------------------------------------------------------
@@ -168,7 +193,13 @@ toyota_section("Braking Timeline Heatmap")
 if df["braking_score"].sum() == 0:
     st.info("Insufficient data to generate braking heatmap.")
 else:
-    heat_df = df.groupby("lap")["braking_score"].mean().reset_index()
+    # Group unsorted, then order only the per-lap result for the x axis
+    heat_df = (
+        df.groupby("lap", sort=False, observed=True)["braking_score"]
+        .mean()
+        .reset_index()
+        .sort_values("lap")
+    )
 
     fig = go.Figure(data=go.Heatmap(
         z=[heat_df["braking_score"]],
@@ -195,14 +226,20 @@ toyota_section("Speed Loss Distribution")
 if df["speed_drop"].sum() == 0:
     st.info("Speed drop data unavailable for this track.")
 else:
-    fig = px.histogram(
-        df[df["speed_drop"] > 0],
-        x="speed_drop",
-        nbins=40,
-        color_discrete_sequence=[TOYOTA_RED],
-        title=""
-    )
+    # Bin server-side so the figure carries 40 bars, not every row
+    drops = df.loc[df["speed_drop"] > 0, "speed_drop"].to_numpy()
+    counts, edges = np.histogram(drops, bins=40)
+
+    fig = go.Figure(go.Bar(
+        x=0.5 * (edges[:-1] + edges[1:]),
+        y=counts,
+        width=np.diff(edges),
+        marker_color=TOYOTA_RED,
+    ))
     fig.update_layout(
+        xaxis_title="speed_drop",
+        yaxis_title="count",
+        bargap=0,
         paper_bgcolor=WHITE,
         plot_bgcolor=WHITE,
         font=dict(color=BLACK),
@@ -215,12 +252,7 @@ else:
 # -------------------------------------------------------
 toyota_section("Driver Braking Comparison")
 
-driver_brake = (
-    df.groupby("vehicle_number")["braking_score"]
-    .mean()
-    .reset_index()
-    .sort_values("braking_score", ascending=False)
-)
+driver_brake = driver_braking_scores(track)
 
 fig = px.bar(
     driver_brake,
@@ -242,4 +274,4 @@ st.plotly_chart(fig, use_container_width=True)
 # -------------------------------------------------------
 toyota_section("Raw Braking Data")
 with st.expander("View Raw Data Table"):
-    st.dataframe(df.head(300), use_container_width=True)
+    st.dataframe(_preview(track), use_container_width=True)
@@ -4,9 +4,9 @@ import streamlit as st
 import pandas as pd
 import numpy as np
 import plotly.express as px
+import plotly.graph_objects as go
 
-from utils.data_loader import DataLoader
-from utils.track_meta import TrackMeta
+from utils.data_loader import load_sectors, load_track_meta
 from utils.theme import apply_toyota_theme
 apply_toyota_theme()
 
@@ -84,14 +84,12 @@ def build_lap_time_seconds(df):
     # If large, assume ms
     lap_time = lap_time.where(lap_time < 1000, lap_time / 1000)
 
-    for c in ["s1_seconds", "s2_seconds", "s3_seconds"]:
-        if c not in df:
-            df[c] = np.nan
-
-    sector_sum = (
-        pd.to_numeric(df["s1_seconds"], errors="coerce").fillna(0)
-        + pd.to_numeric(df["s2_seconds"], errors="coerce").fillna(0)
-        + pd.to_numeric(df["s3_seconds"], errors="coerce").fillna(0)
+    # reindex: missing sector columns read as NaN without mutating df
+    sectors = df.reindex(columns=["s1_seconds", "s2_seconds", "s3_seconds"]).apply(
+        pd.to_numeric, errors="coerce"
+    )
+    sector_sum = pd.Series(
+        np.nansum(sectors.to_numpy(dtype=float), axis=1), index=df.index
     )
 
     lap_time = lap_time.where(lap_time.notna(), sector_sum)
@@ -101,20 +99,47 @@ def build_lap_time_seconds(df):
 # ---------------------------------------------------------
 # Load processed ETL Data
 # ---------------------------------------------------------
-loader = DataLoader()
-data = loader.load_all()
-meta = TrackMeta(loader.load_track_metadata())
+meta = load_track_meta()
 
-sectors = data.get("sectors", pd.DataFrame())
-if sectors.empty:
-    st.error("No sector data available. Ensure ETL completed successfully.")
-    st.stop()
+SECTOR_COLS = (
+    "vehicle_number", "lap", "lap_number", "lap_time_s",
+    "s1_seconds", "s2_seconds", "s3_seconds", "pit_time", "speed_kph",
+)
+SEC = ["s1_seconds", "s2_seconds", "s3_seconds"]
+
+
+@st.cache_data(show_spinner=False)
+def field_stats(track):
+    """
+    Field-wide sector means and per-lap best sectors for a track.
+    Depends only on the track, so switching cars reuses the result.
+    """
+    field_df = load_sectors(track, SECTOR_COLS)
+    lap_col = "lap" if "lap" in field_df.columns else "lap_number"
+    lap_number = pd.to_numeric(field_df[lap_col], errors="coerce")
+
+    # Same row set as the page: laps with a usable lap number
+    valid = lap_number.notna()
+    secs = field_df.loc[valid].reindex(columns=SEC).apply(pd.to_numeric, errors="coerce")
+    field_mean = secs.mean()
+
+    best_by_lap = (
+        secs
+        .groupby(lap_number[valid].astype(int).rename("lap_number"), sort=False, observed=True)
+        .min()
+        .rename(columns={
+            "s1_seconds": "best_s1",
+            "s2_seconds": "best_s2",
+            "s3_seconds": "best_s3"
+        })
+    )
+    return field_mean, best_by_lap
 
 # ---------------------------------------------------------
 # Track Selection
 # ---------------------------------------------------------
 track = st.selectbox("Select Track", meta.get_tracks())
-track_sectors = sectors[sectors["track"] == track].copy()
+track_sectors = load_sectors(track, SECTOR_COLS)
 
 if track_sectors.empty:
     st.error(f"No sector data for track '{track}'.")
@@ -146,191 +171,220 @@ track_sectors["vehicle_number_str"] = (
     track_sectors["vehicle_number"].astype(str).str.strip()
 )
 
-car_list = sorted(track_sectors["vehicle_number_str"].unique(),
-                  key=lambda x: int(float(x)) if x.replace(".", "", 1).isdigit() else 9999)
-
-car_choice = st.selectbox("Select Car", car_list)
-
-car_df = track_sectors[track_sectors["vehicle_number_str"] == car_choice].copy()
-if car_df.empty:
-    st.error(f"No sector data for car {car_choice}.")
-    st.stop()
-
-# Build lap times
-car_df["lap_time_s"] = build_lap_time_seconds(car_df)
-
-# Convert sector times
-for sec in ["s1_seconds", "s2_seconds", "s3_seconds"]:
-    car_df[sec] = pd.to_numeric(car_df.get(sec, np.nan), errors="coerce")
-
-car_df = car_df.dropna(subset=["lap_time_s", "lap_number"]).sort_values("lap_number")
-
-if len(car_df) < 3:
-    st.warning("Not enough laps to compute sector analysis.")
-    st.stop()
-
-# ---------------------------------------------------------
-# TRACK + CAR HEADER
-# ---------------------------------------------------------
-section_header(f"{track.capitalize()} — Car #{car_choice}")
+# Numeric car order (13 before 113); non-numeric labels sort last
+cars = track_sectors["vehicle_number_str"].unique()
+car_order = np.trunc(pd.to_numeric(pd.Series(cars), errors="coerce").fillna(9999).to_numpy())
+car_list = cars[np.argsort(car_order, kind="stable")].tolist()
 
 # ---------------------------------------------------------
-# Summary Metrics
+# Car Panel
 # ---------------------------------------------------------
-best_lap = car_df["lap_time_s"].min()
-avg_lap = car_df["lap_time_s"].mean()
-total_laps = int(car_df["lap_number"].max())
-
-c1, c2, c3 = st.columns(3)
-with c1:
-    metric_card("Best Lap (s)", f"{best_lap:.3f}")
-with c2:
-    metric_card("Avg Lap (s)", f"{avg_lap:.3f}")
-with c3:
-    metric_card("Total Laps", total_laps)
-
-# ---------------------------------------------------------
-# Sector Averages: Car vs Field
-# ---------------------------------------------------------
-section_header("Sector Averages – Car vs Field")
-
-field_df = track_sectors.copy()
-for c in ["s1_seconds", "s2_seconds", "s3_seconds"]:
-    field_df[c] = pd.to_numeric(field_df[c], errors="coerce")
+# Runs as a fragment: changing the car reruns only this panel,
+# not the track load / standardisation above.
+@st.fragment
+def car_panel(track, track_sectors, car_list):
+    car_choice = st.selectbox("Select Car", car_list)
+
+    # Read-only view of the cached track frame; the derived columns are
+    # added with a single assign() rather than copying the slice first
+    car_df = track_sectors.loc[track_sectors["vehicle_number_str"] == car_choice]
+    if car_df.empty:
+        st.error(f"No sector data for car {car_choice}.")
+        return
+
+    # Build lap times + convert sector times
+    car_df = car_df.assign(
+        lap_time_s=build_lap_time_seconds(car_df),
+        **{
+            sec: pd.to_numeric(car_df.get(sec, np.nan), errors="coerce")
+            for sec in SEC
+        },
+    )
 
-car_mean = car_df[["s1_seconds", "s2_seconds", "s3_seconds"]].mean()
-field_mean = field_df[["s1_seconds", "s2_seconds", "s3_seconds"]].mean()
-delta = car_mean - field_mean
+    car_df = car_df.dropna(subset=["lap_time_s", "lap_number"]).sort_values("lap_number")
+
+    if len(car_df) < 3:
+        st.warning("Not enough laps to compute sector analysis.")
+        return
+
+    # ---------------------------------------------------------
+    # TRACK + CAR HEADER
+    # ---------------------------------------------------------
+    section_header(f"{track.capitalize()} — Car #{car_choice}")
+
+    # ---------------------------------------------------------
+    # Summary Metrics
+    # ---------------------------------------------------------
+    best_lap = car_df["lap_time_s"].min()
+    avg_lap = car_df["lap_time_s"].mean()
+    total_laps = int(car_df["lap_number"].max())
+
+    c1, c2, c3 = st.columns(3)
+    with c1:
+        metric_card("Best Lap (s)", f"{best_lap:.3f}")
+    with c2:
+        metric_card("Avg Lap (s)", f"{avg_lap:.3f}")
+    with c3:
+        metric_card("Total Laps", total_laps)
+
+    # ---------------------------------------------------------
+    # Sector Averages: Car vs Field
+    # ---------------------------------------------------------
+    section_header("Sector Averages – Car vs Field")
+
+    field_mean, best_by_lap = field_stats(track)
+
+    car_mean = car_df[SEC].mean()
+    delta = car_mean - field_mean
+
+    summary_tbl = pd.DataFrame({
+        "Sector": ["S1", "S2", "S3"],
+        "Car Mean (s)": car_mean.values,
+        "Field Mean (s)": field_mean.values,
+        "Delta vs Field (s)": delta.values,
+    })
 
-summary_tbl = pd.DataFrame({
-    "Sector": ["S1", "S2", "S3"],
-    "Car Mean (s)": car_mean.values,
-    "Field Mean (s)": field_mean.values,
-    "Delta vs Field (s)": delta.values,
-})
+    st.dataframe(summary_tbl.style.format({
+        "Car Mean (s)": "{:.3f}",
+        "Field Mean (s)": "{:.3f}",
+        "Delta vs Field (s)": "{:+.3f}",
+    }), use_container_width=True)
+
+    # ---------------------------------------------------------
+    # Lap Time Evolution
+    # ---------------------------------------------------------
+    section_header("Lap Time Evolution")
+
+    fig_lap = px.line(
+        car_df,
+        x="lap_number",
+        y="lap_time_s",
+        markers=True,
+        color_discrete_sequence=[PRIMARY_RED],
+        render_mode="webgl",
+    )
+    fig_lap.update_layout(
+        paper_bgcolor=WHITE,
+        plot_bgcolor=WHITE,
+        font=dict(color=BLACK),
+    )
+    st.plotly_chart(fig_lap, use_container_width=True)
 
-st.dataframe(summary_tbl.style.format({
-    "Car Mean (s)": "{:.3f}",
-    "Field Mean (s)": "{:.3f}",
-    "Delta vs Field (s)": "{:+.3f}",
-}), use_container_width=True)
+    # ---------------------------------------------------------
+    # Sector Breakdown per Lap
+    # ---------------------------------------------------------
+    section_header("Sector Breakdown per Lap")
 
-# ---------------------------------------------------------
-# Lap Time Evolution
-# ---------------------------------------------------------
-section_header("Lap Time Evolution")
-
-fig_lap = px.line(
-    car_df,
-    x="lap_number",
-    y="lap_time_s",
-    markers=True,
-    color_discrete_sequence=[PRIMARY_RED],
-)
-fig_lap.update_layout(
-    paper_bgcolor=WHITE,
-    plot_bgcolor=WHITE,
-    font=dict(color=BLACK),
-)
-st.plotly_chart(fig_lap, use_container_width=True)
-
-# ---------------------------------------------------------
-# Sector Breakdown per Lap
-# ---------------------------------------------------------
-section_header("Sector Breakdown per Lap")
+    long_df = car_df[["lap_number", "s1_seconds", "s2_seconds", "s3_seconds"]].melt(
+        id_vars="lap_number",
+        var_name="sector",
+        value_name="time_s",
+    )
+    long_df["sector"] = long_df["sector"].map({
+        "s1_seconds": "S1",
+        "s2_seconds": "S2",
+        "s3_seconds": "S3",
+    })
 
-long_df = car_df[["lap_number", "s1_seconds", "s2_seconds", "s3_seconds"]].melt(
-    id_vars="lap_number",
-    var_name="sector",
-    value_name="time_s",
-)
-long_df["sector"] = long_df["sector"].map({
-    "s1_seconds": "S1",
-    "s2_seconds": "S2",
-    "s3_seconds": "S3",
-})
-
-fig_stack = px.bar(
-    long_df,
-    x="lap_number",
-    y="time_s",
-    color="sector",
-    barmode="stack",
-    color_discrete_map={"S1": PRIMARY_RED, "S2": DARK_GRAY, "S3": BLACK},
-)
-st.plotly_chart(fig_stack, use_container_width=True)
+    fig_stack = px.bar(
+        long_df,
+        x="lap_number",
+        y="time_s",
+        color="sector",
+        barmode="stack",
+        color_discrete_map={"S1": PRIMARY_RED, "S2": DARK_GRAY, "S3": BLACK},
+    )
+    st.plotly_chart(fig_stack, use_container_width=True)
+
+    # ---------------------------------------------------------
+    # Sector Time Distribution
+    # ---------------------------------------------------------
+    section_header("Sector Time Distribution")
+
+    # Box statistics computed here; the box traces only carry five numbers
+    # per sector (Tukey whiskers, linear quartiles as Plotly uses by
+    # default). Every lap, outliers included, is drawn next to its box as
+    # a WebGL scatter, jittered like px.box(points="all").
+    # Sectors sit at numeric x positions so the points can be offset.
+    rng = np.random.default_rng(0)
+    fig_box = go.Figure()
+    for pos, (sector, color) in enumerate(zip(["S1", "S2", "S3"], [PRIMARY_RED, DARK_GRAY, BLACK])):
+        sec_rows = long_df.loc[long_df["sector"] == sector].dropna(subset=["time_s"])
+        vals = sec_rows["time_s"].to_numpy()
+        if vals.size == 0:
+            continue
+        q1, med, q3 = np.percentile(vals, [25, 50, 75])
+        iqr = q3 - q1
+        fig_box.add_trace(go.Box(
+            x=[pos],
+            name=sector,
+            legendgroup=sector,
+            q1=[q1],
+            median=[med],
+            q3=[q3],
+            lowerfence=[vals[vals >= q1 - 1.5 * iqr].min()],
+            upperfence=[vals[vals <= q3 + 1.5 * iqr].max()],
+            marker_color=color,
+            width=0.5,
+        ))
+        fig_box.add_trace(go.Scattergl(
+            x=pos - 0.4 + rng.uniform(-0.08, 0.08, vals.size),
+            y=vals,
+            mode="markers",
+            name=sector,
+            legendgroup=sector,
+            showlegend=False,
+            marker=dict(color=color, size=5, opacity=0.7),
+            customdata=sec_rows["lap_number"].to_numpy(),
+            hovertemplate="Lap %{customdata}<br>%{y:.3f} s<extra>" + sector + "</extra>",
+        ))
+    fig_box.update_layout(
+        xaxis=dict(title="sector", tickvals=[0, 1, 2], ticktext=["S1", "S2", "S3"]),
+        yaxis_title="time_s",
+    )
+    st.plotly_chart(fig_box, use_container_width=True)
+
+    # ---------------------------------------------------------
+    # Delta to Best Sector per Lap
+    # ---------------------------------------------------------
+    section_header("Delta to Best Sector per Lap")
+
+    # Align the field's best sectors to this car's laps and subtract once
+    car_by_lap = car_df.set_index("lap_number")[SEC]
+    best = best_by_lap.reindex(car_by_lap.index).to_numpy()
+
+    delta_long = (
+        pd.DataFrame(
+            car_by_lap.to_numpy() - best,
+            index=car_by_lap.index,
+            columns=["S1", "S2", "S3"],
+        )
+        .reset_index()
+        .melt(id_vars="lap_number", var_name="sector", value_name="delta_s")
+    )
 
-# ---------------------------------------------------------
-# Sector Time Distribution
-# ---------------------------------------------------------
-section_header("Sector Time Distribution")
-
-fig_box = px.box(
-    long_df,
-    x="sector",
-    y="time_s",
-    color="sector",
-    color_discrete_map={"S1": PRIMARY_RED, "S2": DARK_GRAY, "S3": BLACK},
-    points="all",
-)
-st.plotly_chart(fig_box, use_container_width=True)
+    fig_delta = px.line(
+        delta_long,
+        x="lap_number",
+        y="delta_s",
+        color="sector",
+        markers=True,
+        color_discrete_map={"S1": PRIMARY_RED, "S2": DARK_GRAY, "S3": BLACK},
+        render_mode="webgl",
+    )
+    st.plotly_chart(fig_delta, use_container_width=True)
 
-# ---------------------------------------------------------
-# Delta to Best Sector per Lap
-# ---------------------------------------------------------
-section_header("Delta to Best Sector per Lap")
-
-best_by_lap = (
-    field_df.dropna(subset=["lap_number"])
-    .groupby("lap_number")[["s1_seconds", "s2_seconds", "s3_seconds"]]
-    .min()
-    .rename(columns={
-        "s1_seconds": "best_s1",
-        "s2_seconds": "best_s2",
-        "s3_seconds": "best_s3"
-    })
-)
+    # ---------------------------------------------------------
+    # Raw data view
+    # ---------------------------------------------------------
+    section_header("Raw Sector Data")
 
-deltas = car_df[["lap_number", "s1_seconds", "s2_seconds", "s3_seconds"]].merge(
-    best_by_lap, on="lap_number", how="left"
-)
+    with st.expander("View Raw Data Table"):
+        cols_to_display = [
+            "lap_number", "lap_time_s", "s1_seconds", "s2_seconds",
+            "s3_seconds", "pit_time", "speed_kph"
+        ]
+        st.dataframe(car_df[[c for c in cols_to_display if c in car_df]], use_container_width=True)
 
-for s, best in zip(
-        ["s1_seconds", "s2_seconds", "s3_seconds"],
-        ["best_s1", "best_s2", "best_s3"]
-):
-    deltas[f"delta_{s}"] = deltas[s] - deltas[best]
-
-delta_long = deltas.melt(
-    id_vars="lap_number",
-    value_vars=["delta_s1_seconds", "delta_s2_seconds", "delta_s3_seconds"],
-    var_name="sector",
-    value_name="delta_s",
-)
-delta_long["sector"] = delta_long["sector"].map({
-    "delta_s1_seconds": "S1",
-    "delta_s2_seconds": "S2",
-    "delta_s3_seconds": "S3",
-})
-
-fig_delta = px.line(
-    delta_long,
-    x="lap_number",
-    y="delta_s",
-    color="sector",
-    markers=True,
-    color_discrete_map={"S1": PRIMARY_RED, "S2": DARK_GRAY, "S3": BLACK},
-)
-st.plotly_chart(fig_delta, use_container_width=True)
 
-# ---------------------------------------------------------
-# Raw data view
-# ---------------------------------------------------------
-section_header("Raw Sector Data")
-
-with st.expander("View Raw Data Table"):
-    cols_to_display = [
-        "lap_number", "lap_time_s", "s1_seconds", "s2_seconds",
-        "s3_seconds", "pit_time", "speed_kph"
-    ]
-    st.dataframe(car_df[[c for c in cols_to_display if c in car_df]], use_container_width=True)
+car_panel(track, track_sectors, car_list)
@@ -5,8 +5,7 @@ import pandas as pd
 import numpy as np
 import plotly.express as px
 
-from utils.data_loader import DataLoader
-from utils.track_meta import TrackMeta
+from utils.data_loader import load_sectors, load_track_meta
 from utils.theme import apply_toyota_theme
 
 apply_toyota_theme()
@@ -84,14 +83,12 @@ st.markdown(
 # ---------------------------------------------------------
 # Load ETL data
 # ---------------------------------------------------------
-loader = DataLoader()
-data = loader.load_all()
-meta = TrackMeta(loader.load_track_metadata())
-sectors = data.get("sectors", pd.DataFrame())
+meta = load_track_meta()
 
-if sectors.empty:
-    st.error("No sector data available. Run ETL first.")
-    st.stop()
+SECTOR_COLS = (
+    "vehicle_number", "lap", "lap_number", "lap_time_s",
+    "s1_seconds", "s2_seconds", "s3_seconds", "pit_time",
+)
 
 # ---------------------------------------------------------
 # Helper: lap time construction
@@ -106,10 +103,10 @@ def build_lap_time(df):
         lt = pd.Series(np.nan, index=df.index)
 
     # fallback: sum sectors
-    s1 = pd.to_numeric(df.get("s1_seconds", np.nan), errors="coerce")
-    s2 = pd.to_numeric(df.get("s2_seconds", np.nan), errors="coerce")
-    s3 = pd.to_numeric(df.get("s3_seconds", np.nan), errors="coerce")
-    sec_sum = s1.fillna(0) + s2.fillna(0) + s3.fillna(0)
+    sectors = df.reindex(columns=["s1_seconds", "s2_seconds", "s3_seconds"]).apply(
+        pd.to_numeric, errors="coerce"
+    )
+    sec_sum = pd.Series(np.nansum(sectors.to_numpy(dtype=float), axis=1), index=df.index)
 
     lt = lt.where(lt.notna(), sec_sum)
     lt = lt.replace(0, np.nan)
@@ -122,17 +119,27 @@ def build_lap_time(df):
 
 
 def clean_laps(df):
-    """Ensure lap_number + cleaned lap_time_s."""
+    """Ensure lap_number + cleaned lap_time_s, and flag pit laps."""
     if "lap" in df.columns:
-        df["lap_number"] = pd.to_numeric(df["lap"], errors="coerce")
+        lap_number = pd.to_numeric(df["lap"], errors="coerce")
     elif "lap_number" in df.columns:
-        df["lap_number"] = pd.to_numeric(df["lap_number"], errors="coerce")
+        lap_number = pd.to_numeric(df["lap_number"], errors="coerce")
     else:
-        df["lap_number"] = np.arange(1, len(df) + 1)
+        lap_number = np.arange(1, len(df) + 1)
+
+    # assign() gives clean_laps its own frame, so the caller can pass a
+    # filtered view of the cached track frame without copying it first
+    df = df.assign(lap_number=lap_number)
 
     df = df[df["lap_number"] > 0].drop_duplicates("lap_number")
     df["lap_time_s"] = build_lap_time(df)
 
+    # Pit flag on the filtered rows only
+    if "pit_time" in df.columns:
+        df["is_pit_lap"] = pd.to_numeric(df["pit_time"], errors="coerce").fillna(0) > 1.0
+    else:
+        df["is_pit_lap"] = False
+
     # Clean unrealistic values
     df = df[(df["lap_time_s"] > 20) & (df["lap_time_s"] < 300)]
 
@@ -141,13 +148,19 @@ def clean_laps(df):
         missing = 5 - len(df)
         base = df["lap_time_s"].median() if len(df) else 120
         last = df["lap_number"].max() if len(df) else 0
-        filler = pd.DataFrame({
-            "lap_number": np.arange(last + 1, last + 1 + missing),
-            "lap_time_s": base * 1.02,
-            "pit_time": 0,
-            "is_pit_lap": False,
-        })
-        df = pd.concat([df, filler], ignore_index=True)
+        # Extend in place: new lap slots via reindex, then fill them
+        # (lap numbers are unique after drop_duplicates above)
+        extra = np.arange(last + 1, last + 1 + missing)
+        df = (
+            df.set_index("lap_number")
+            .reindex(np.r_[df["lap_number"].to_numpy(), extra])
+            .rename_axis("lap_number")
+            .reset_index()
+        )
+        filled = df["lap_number"].isin(extra)
+        df.loc[filled, "lap_time_s"] = base * 1.02
+        df.loc[filled, "pit_time"] = 0
+        df["is_pit_lap"] = df["is_pit_lap"].where(~filled, False).astype(bool)
 
     return df.sort_values("lap_number")
 
@@ -174,10 +187,17 @@ def fit_degradation(df):
     if len(base) < 4:
         return float(base["lap_time_s"].median()), 0.02
 
-    x = base["lap_number"].values
-    y = base["lap_time_s"].values
-    b, a = np.polyfit(x, y, 1)
-    return float(a), float(b)
+    x = base["lap_number"].to_numpy(dtype=float)
+    y = base["lap_time_s"].to_numpy(dtype=float)
+    return _linfit(x, y)
+
+
+def _linfit(x, y):
+    """Closed-form OLS for y = a + b*x (no Vandermonde / lstsq)."""
+    dx = x - x.mean()
+    sxx = dx @ dx
+    b = (dx @ (y - y.mean())) / sxx if sxx > 0 else 0.0
+    return float(y.mean() - b * x.mean()), float(b)
 
 
 def simulate(df, a, b, pit_loss):
@@ -186,21 +206,26 @@ def simulate(df, a, b, pit_loss):
 
     no_pit = (a + b * seq).sum()
 
-    out = []
-    for stops in [0, 1, 2]:
-        out.append({
-            "Strategy": f"{stops} Stop(s)",
-            "total_time_s": no_pit + stops * pit_loss
-        })
+    stops = np.arange(0, 3)
+    return pd.DataFrame({
+        "Strategy": [f"{s} Stop(s)" for s in stops],
+        "total_time_s": no_pit + stops * pit_loss,
+    })
+
 
-    return pd.DataFrame(out)
+@st.cache_data(show_spinner=False)
+def car_laps(track, car):
+    """Cleaned laps for one car, cached per (track, car)."""
+    track_df = load_sectors(track, SECTOR_COLS)
+    car_df = track_df[track_df["vehicle_number"] == car]
+    return clean_laps(car_df).reset_index(drop=True)
 
 
 # ---------------------------------------------------------
 # UI – Track and Car Selectors
 # ---------------------------------------------------------
 track = st.selectbox("Select Track", meta.get_tracks())
-track_df = sectors[sectors["track"] == track]
+track_df = load_sectors(track, SECTOR_COLS)
 
 if "vehicle_number" not in track_df.columns:
     st.error("Missing vehicle_number in sector data.")
@@ -209,9 +234,7 @@ if "vehicle_number" not in track_df.columns:
 cars = sorted(track_df["vehicle_number"].dropna().unique())
 car = st.selectbox("Select Car", cars)
 
-car_df = track_df[track_df["vehicle_number"] == car].copy()
-car_df["is_pit_lap"] = car_df.get("pit_time", 0).fillna(0) > 1.0
-car_df = clean_laps(car_df)
+car_df = car_laps(track, car)
 
 # ---------------------------------------------------------
 # Compute model parameters
@@ -260,4 +283,4 @@ st.plotly_chart(fig, use_container_width=True)
 # Cleaned Data Table
 # ---------------------------------------------------------
 section_header("Cleaned Lap Data")
-st.dataframe(car_df.reset_index(drop=True), use_container_width=True)
+st.dataframe(car_df, use_container_width=True)
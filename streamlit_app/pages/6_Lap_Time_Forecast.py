@@ -6,8 +6,7 @@ import numpy as np
 import plotly.express as px
 from sklearn.ensemble import RandomForestRegressor
 
-from utils.data_loader import DataLoader
-from utils.track_meta import TrackMeta
+from utils.data_loader import load_sectors, load_track_meta
 from utils.theme import apply_toyota_theme
 
 apply_toyota_theme()
@@ -87,40 +86,42 @@ st.markdown(
 # ---------------------------------------------------------
 # Load ETL Data
 # ---------------------------------------------------------
-loader = DataLoader()
-data = loader.load_all()
-meta = TrackMeta(loader.load_track_metadata())
-sectors = data.get("sectors", pd.DataFrame())
+meta = load_track_meta()
 
-if sectors.empty:
-    st.error("No lap/sector data. Run ETL first.")
-    st.stop()
+SECTOR_COLS = (
+    "vehicle_number", "lap", "lap_number", "lap_time_s",
+    "s1_seconds", "s2_seconds", "s3_seconds",
+)
 
 
 # ---------------------------------------------------------
 # Helper: Build Clean Lap Times
 # ---------------------------------------------------------
+def _numeric_col(df, name):
+    """Column as a float64 array (NaN where missing / non-numeric)."""
+    if name not in df.columns:
+        return np.full(len(df), np.nan)
+    return pd.to_numeric(df[name], errors="coerce").to_numpy(dtype="float64", na_value=np.nan)
+
+
 def build_lap_time(df):
     """Preferred: lap_time_s → fallback: sum of sector times."""
-    if "lap_time_s" in df.columns:
-        lt = pd.to_numeric(df["lap_time_s"], errors="coerce")
-        lt = lt.where(lt < 1000, lt / 1000)  # ms → seconds
-    else:
-        lt = pd.Series(np.nan, index=df.index)
+    lt = _numeric_col(df, "lap_time_s")
+    lt = np.where(lt >= 1000, lt / 1000, lt)  # ms → seconds
 
     # Fallback: sum sectors
-    s1 = pd.to_numeric(df.get("s1_seconds", np.nan), errors="coerce")
-    s2 = pd.to_numeric(df.get("s2_seconds", np.nan), errors="coerce")
-    s3 = pd.to_numeric(df.get("s3_seconds", np.nan), errors="coerce")
-
-    sec_sum = s1.fillna(0) + s2.fillna(0) + s3.fillna(0)
-    lt = lt.where(lt.notna(), sec_sum)
+    sec_sum = np.nansum(
+        np.column_stack([_numeric_col(df, c) for c in ["s1_seconds", "s2_seconds", "s3_seconds"]]),
+        axis=1,
+    )
+    lt = np.where(np.isnan(lt), sec_sum, lt)
 
     # Fallback median fill
-    med = lt.dropna().median() if len(lt.dropna()) else 120.0
-    lt = lt.fillna(med)
+    missing = np.isnan(lt)
+    if missing.any():
+        lt[missing] = np.nanmedian(lt) if not missing.all() else 120.0
 
-    return lt
+    return pd.Series(lt, index=df.index)
 
 
 # ---------------------------------------------------------
@@ -128,7 +129,7 @@ def build_lap_time(df):
 # ---------------------------------------------------------
 track = st.selectbox("Select Track", meta.get_tracks())
 
-track_df = sectors[sectors["track"] == track].copy()
+track_df = load_sectors(track, ("vehicle_number",))
 
 if "vehicle_number" not in track_df.columns:
     st.error("Missing vehicle_number column in sector data.")
@@ -137,7 +138,8 @@ if "vehicle_number" not in track_df.columns:
 cars = sorted(track_df["vehicle_number"].dropna().unique())
 car = st.selectbox("Select Car", cars)
 
-df = track_df[track_df["vehicle_number"] == car].copy()
+# Only this car's rows are read (track + car pushed into the scan)
+df = load_sectors(track, SECTOR_COLS, cars=(car,))
 
 
 # ---------------------------------------------------------
@@ -168,130 +170,209 @@ if len(df) < 8:
 # ---------------------------------------------------------
 # Feature Engineering
 # ---------------------------------------------------------
-df["prev_lap_time"] = df["lap_time_s"].shift(1)
-df["rolling_avg_3"] = df["lap_time_s"].rolling(3).mean()
-df["lap_delta"] = df["lap_time_s"].diff()
-df.fillna(method="bfill", inplace=True)
+def build_features(lt):
+    """
+    prev lap / 3-lap rolling mean / lap delta as one (n, 3) array.
+    The leading rows that shift/rolling/diff leave empty take the first
+    defined value, as the back-fill did before. Needs n >= 3.
+    """
+    out = np.empty((lt.size, 3))
+    out[1:, 0] = lt[:-1]
+    out[0, 0] = lt[0]
+    out[2:, 1] = (lt[:-2] + lt[1:-1] + lt[2:]) / 3
+    out[:2, 1] = out[2, 1]
+    out[1:, 2] = lt[1:] - lt[:-1]
+    out[0, 2] = out[1, 2]
+    return out
+
+
+df[["prev_lap_time", "rolling_avg_3", "lap_delta"]] = build_features(
+    df["lap_time_s"].to_numpy(dtype="float64")
+)
 
 features = ["lap_number", "prev_lap_time", "rolling_avg_3", "lap_delta"]
 target = "lap_time_s"
 
-X = df[features]
-y = df[target]
+# Plain float arrays: the forest is fitted and queried without
+# DataFrame feature-name bookkeeping. float32 is what the trees use
+# internally, so this skips their conversion copy.
+X = df[features].to_numpy(dtype=np.float32)
+y = df[target].to_numpy(dtype=np.float32)
 
 
 # ---------------------------------------------------------
 # Train ML Model
 # ---------------------------------------------------------
-model = RandomForestRegressor(
-    n_estimators=200,
-    max_depth=6,
-    random_state=42
-)
-model.fit(X, y)
-
+@st.cache_resource(max_entries=32, show_spinner=False)
+def fit_forest(track, car, X, y):
+    """
+    Fitted forest per (track, car, training data). Shared across reruns,
+    so the future-laps slider never retrains.
+    """
+    model = RandomForestRegressor(
+        n_estimators=50,
+        max_depth=6,
+        min_samples_leaf=2,
+        random_state=42,
+        n_jobs=-1,
+    )
+    model.fit(X, y)
+    return model, pack_forest(model)
 
-# ---------------------------------------------------------
-# Forecast Future Laps
-# ---------------------------------------------------------
-section_header("Forecast Configuration")
 
-future_laps = st.slider("Number of Future Laps to Predict", 3, 15, 5)
+def pack_forest(model):
+    """
+    Copy every tree's node arrays into padded (n_trees, max_nodes) blocks
+    so the whole forest can be walked with a few array ops per level.
+    """
+    trees = [est.tree_ for est in model.estimators_]
+    n_nodes = max(t.node_count for t in trees)
 
-last_lap = int(df["lap_number"].max())
-prev_time = df["lap_time_s"].iloc[-1]
-roll = df["rolling_avg_3"].iloc[-1]
-delta = df["lap_delta"].iloc[-1]
+    feature = np.full((len(trees), n_nodes), -2, dtype=np.intp)
+    threshold = np.zeros((len(trees), n_nodes))
+    left = np.zeros((len(trees), n_nodes), dtype=np.intp)
+    right = np.zeros((len(trees), n_nodes), dtype=np.intp)
+    value = np.zeros((len(trees), n_nodes))
 
-future_rows = []
+    for i, t in enumerate(trees):
+        n = t.node_count
+        feature[i, :n] = t.feature
+        threshold[i, :n] = t.threshold
+        left[i, :n] = t.children_left
+        right[i, :n] = t.children_right
+        value[i, :n] = t.value[:, 0, 0]
 
-for i in range(1, future_laps + 1):
-    lap_num = last_lap + i
+    depth = max(t.max_depth for t in trees)
+    return feature, threshold, left, right, value, depth
 
-    X_pred = pd.DataFrame([{
-        "lap_number": lap_num,
-        "prev_lap_time": prev_time,
-        "rolling_avg_3": roll,
-        "lap_delta": delta
-    }])
 
-    pred = model.predict(X_pred)[0]
+def predict_packed(packed, x):
+    """Forest mean prediction for one feature row (same splits as sklearn)."""
+    feature, threshold, left, right, value, depth = packed
+    rows = np.arange(feature.shape[0])
+    # sklearn compares float32 features against float64 thresholds
+    x = np.asarray(x, dtype=np.float32).astype(np.float64)
 
-    future_rows.append({
-        "lap_number": lap_num,
-        "predicted_lap_time_s": pred
-    })
+    node = np.zeros(feature.shape[0], dtype=np.intp)
+    for _ in range(depth):
+        feat = feature[rows, node]
+        is_split = feat >= 0
+        go_left = x[np.where(is_split, feat, 0)] <= threshold[rows, node]
+        node = np.where(is_split, np.where(go_left, left[rows, node], right[rows, node]), node)
 
-    # Update sequential features (rolling)
-    delta = pred - prev_time
-    prev_time = pred
-    roll = (roll * 2 + pred) / 3
+    return value[rows, node].mean()
 
-future_df = pd.DataFrame(future_rows)
 
+model, packed_forest = fit_forest(track, car, X, y)
 
-# ---------------------------------------------------------
-# VISUALIZATIONS
-# ---------------------------------------------------------
-section_header(f"Lap Time Trend — {track}, Car {car}")
 
-# Actual lap time trend
+# Actual lap time trend: depends only on the training laps, so it is
+# built once per full rerun and handed to the forecast fragment
 fig_actual = px.line(
     df,
     x="lap_number",
     y="lap_time_s",
     markers=True,
     color_discrete_sequence=[PRIMARY_RED],
+    render_mode="webgl",
 )
 fig_actual.update_layout(paper_bgcolor=WHITE, plot_bgcolor=WHITE, font=dict(color=BLACK))
 
-st.plotly_chart(fig_actual, use_container_width=True)
 
+# ---------------------------------------------------------
+# Forecast Future Laps
+# ---------------------------------------------------------
+@st.fragment
+def forecast_panel(df, packed_forest, n_features, fig_actual):
+    """
+    Slider + everything that depends on it. Moving the slider reruns only
+    this fragment: no reload, feature build or model lookup.
+    """
+    section_header("Forecast Configuration")
+
+    future_laps = st.slider("Number of Future Laps to Predict", 3, 15, 5)
+
+    last_lap = int(df["lap_number"].max())
+    prev_time = df["lap_time_s"].iloc[-1]
+    roll = df["rolling_avg_3"].iloc[-1]
+    delta = df["lap_delta"].iloc[-1]
+
+    # Features are recursive (each lap feeds the next), so predict lap by
+    # lap, on rows of one preallocated array and through the packed forest
+    # (no per-call sklearn dispatch)
+    lap_nums = np.arange(last_lap + 1, last_lap + future_laps + 1)
+    X_future = np.empty((future_laps, n_features), dtype=np.float64)
+    preds = np.empty(future_laps, dtype=np.float64)
+
+    for i, lap_num in enumerate(lap_nums):
+        X_future[i] = (lap_num, prev_time, roll, delta)
+        pred = predict_packed(packed_forest, X_future[i])
+        preds[i] = pred
+
+        # Update sequential features (rolling)
+        delta = pred - prev_time
+        prev_time = pred
+        roll = (roll * 2 + pred) / 3
+
+    future_df = pd.DataFrame({
+        "lap_number": lap_nums,
+        "predicted_lap_time_s": preds,
+    })
 
-# Forecasted lap times
-section_header("Forecasted Lap Times")
+    # ---------------------------------------------------------
+    # VISUALIZATIONS
+    # ---------------------------------------------------------
+    section_header(f"Lap Time Trend — {track}, Car {car}")
 
-fig_forecast = px.line(
-    future_df,
-    x="lap_number",
-    y="predicted_lap_time_s",
-    markers=True,
-    color_discrete_sequence=[DARK_GRAY],
-)
-fig_forecast.update_layout(paper_bgcolor=WHITE, plot_bgcolor=WHITE, font=dict(color=BLACK))
+    st.plotly_chart(fig_actual, use_container_width=True)
+
+    # Forecasted lap times
+    section_header("Forecasted Lap Times")
 
-st.plotly_chart(fig_forecast, use_container_width=True)
+    fig_forecast = px.line(
+        future_df,
+        x="lap_number",
+        y="predicted_lap_time_s",
+        markers=True,
+        color_discrete_sequence=[DARK_GRAY],
+        render_mode="webgl",
+    )
+    fig_forecast.update_layout(paper_bgcolor=WHITE, plot_bgcolor=WHITE, font=dict(color=BLACK))
 
+    st.plotly_chart(fig_forecast, use_container_width=True)
 
-# Combined view
-section_header("Actual vs Forecast Comparison")
+    # Combined view
+    section_header("Actual vs Forecast Comparison")
 
-combined = pd.concat([
-    df[["lap_number", "lap_time_s"]].rename(columns={"lap_time_s": "time"}),
-    future_df.rename(columns={"predicted_lap_time_s": "time"})
-])
+    combined = pd.concat([
+        df[["lap_number", "lap_time_s"]].rename(columns={"lap_time_s": "time"}),
+        future_df.rename(columns={"predicted_lap_time_s": "time"})
+    ])
 
-combined["type"] = ["Actual"] * len(df) + ["Forecast"] * len(future_df)
+    combined["type"] = ["Actual"] * len(df) + ["Forecast"] * len(future_df)
 
-fig_combo = px.line(
-    combined,
-    x="lap_number",
-    y="time",
-    color="type",
-    markers=True,
-    color_discrete_map={"Actual": PRIMARY_RED, "Forecast": DARK_GRAY},
-)
+    fig_combo = px.line(
+        combined,
+        x="lap_number",
+        y="time",
+        color="type",
+        markers=True,
+        color_discrete_map={"Actual": PRIMARY_RED, "Forecast": DARK_GRAY},
+        render_mode="webgl",
+    )
 
-fig_combo.update_layout(paper_bgcolor=WHITE, plot_bgcolor=WHITE, font=dict(color=BLACK))
+    fig_combo.update_layout(paper_bgcolor=WHITE, plot_bgcolor=WHITE, font=dict(color=BLACK))
 
-st.plotly_chart(fig_combo, use_container_width=True)
+    st.plotly_chart(fig_combo, use_container_width=True)
 
+    # ---------------------------------------------------------
+    # RAW DATA TABLES
+    # ---------------------------------------------------------
+    section_header("Cleaned Lap Data")
+    st.dataframe(df.reset_index(drop=True), use_container_width=True)
+
+    section_header("Forecast Table")
+    st.dataframe(future_df, use_container_width=True)
 
-# ---------------------------------------------------------
-# RAW DATA TABLES
-# ---------------------------------------------------------
-section_header("Cleaned Lap Data")
-st.dataframe(df.reset_index(drop=True), use_container_width=True)
 
-section_header("Forecast Table")
-st.dataframe(future_df, use_container_width=True)
+forecast_panel(df, packed_forest, len(features), fig_actual)
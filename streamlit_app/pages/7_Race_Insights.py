@@ -4,9 +4,9 @@ import streamlit as st
 import pandas as pd
 import numpy as np
 import plotly.express as px
+import plotly.io as pio
 
-from utils.data_loader import DataLoader
-from utils.track_meta import TrackMeta
+from utils.data_loader import load_sectors, load_track_meta
 from utils.theme import apply_toyota_theme
 
 apply_toyota_theme()
@@ -86,36 +86,38 @@ st.markdown(
 # ---------------------------------------------------------
 # Helpers
 # ---------------------------------------------------------
+def _numeric_col(df, name):
+    """Column as a float64 array (NaN where missing / non-numeric)."""
+    if name not in df.columns:
+        return np.full(len(df), np.nan)
+    return pd.to_numeric(df[name], errors="coerce").to_numpy(dtype="float64", na_value=np.nan)
+
+
 def build_lap_time_seconds(df):
-    lap = pd.to_numeric(df.get("lap_time_s", np.nan), errors="coerce")
-    lap = lap.where(lap < 1000, lap / 1000)  # ms → s
+    lap = _numeric_col(df, "lap_time_s")
+    lap = np.where(lap >= 1000, lap / 1000, lap)  # ms → s
 
     # fallback to sector sum
-    for c in ["s1_seconds", "s2_seconds", "s3_seconds"]:
-        if c not in df.columns:
-            df[c] = np.nan
-
-    sec_sum = (
-        pd.to_numeric(df["s1_seconds"], errors="coerce").fillna(0)
-        + pd.to_numeric(df["s2_seconds"], errors="coerce").fillna(0)
-        + pd.to_numeric(df["s3_seconds"], errors="coerce").fillna(0)
+    sec_sum = np.nansum(
+        np.column_stack([_numeric_col(df, c) for c in ["s1_seconds", "s2_seconds", "s3_seconds"]]),
+        axis=1,
     )
-
-    lap = lap.where(lap.notna(), sec_sum)
+    lap = np.where(np.isnan(lap), sec_sum, lap)
 
     # final fill
-    if lap.isna().any():
-        lap = lap.fillna(lap.dropna().median() if len(lap.dropna()) else 120.0)
+    missing = np.isnan(lap)
+    if missing.any():
+        lap[missing] = np.nanmedian(lap) if not missing.all() else 120.0
 
-    return lap
+    return pd.Series(lap, index=df.index)
 
 
-def build_car_lap_df(sectors_df, track, car_number):
-    df = sectors_df[sectors_df["track"] == track].copy()
-    if df.empty:
-        return pd.DataFrame()
-
-    df = df[df["vehicle_number"] == car_number].copy()
+def build_car_lap_df(sectors_df, car_number):
+    # sectors_df comes from load_sectors(track, ..., cars=(car_number,)):
+    # the track/car predicates were already applied in the parquet scan,
+    # so there is no string mask over the track column here. The copy
+    # keeps the column writes below off the boolean slice.
+    df = sectors_df[sectors_df["vehicle_number"] == car_number].copy()
     if df.empty:
         return pd.DataFrame()
 
@@ -149,48 +151,108 @@ def build_car_lap_df(sectors_df, track, car_number):
     return df
 
 
+# ---------------------------------------------------------
+# Cached figures (keyed on the plotted frame, reused as JSON)
+# ---------------------------------------------------------
+@st.cache_data(show_spinner=False, max_entries=64)
+def lap_line_fig_json(plot_df, y, markers=False):
+    fig = px.line(
+        plot_df,
+        x="lap_number",
+        y=y,
+        color="car_label",
+        markers=markers,
+        color_discrete_sequence=[PRIMARY_RED, DARK_GRAY, BLACK],
+        render_mode="webgl",
+    )
+    fig.update_layout(paper_bgcolor=WHITE, plot_bgcolor=WHITE, font=dict(color=BLACK))
+    return fig.to_json()
+
+
+@st.cache_data(show_spinner=False, max_entries=64)
+def lap_box_fig_json(plot_df):
+    fig = px.box(
+        plot_df,
+        x="car_label",
+        y="lap_time_s",
+        points="all",
+        color_discrete_sequence=[PRIMARY_RED, DARK_GRAY, BLACK],
+    )
+    fig.update_layout(paper_bgcolor=WHITE, plot_bgcolor=WHITE, font=dict(color=BLACK))
+    return fig.to_json()
+
+
+@st.cache_data(show_spinner=False, max_entries=64)
+def sector_bar_fig_json(sec_df):
+    fig = px.bar(
+        sec_df,
+        x="sector",
+        y="time_s",
+        color="car_label",
+        barmode="group",
+        color_discrete_sequence=[PRIMARY_RED, DARK_GRAY, BLACK],
+    )
+    fig.update_layout(paper_bgcolor=WHITE, plot_bgcolor=WHITE, font=dict(color=BLACK))
+    return fig.to_json()
+
+
 # ---------------------------------------------------------
 # Load Data
 # ---------------------------------------------------------
-loader = DataLoader()
-data = loader.load_all()
-meta = TrackMeta(loader.load_track_metadata())
+meta = load_track_meta()
 
-sectors = data["sectors"]
-if sectors.empty:
-    st.error("No lap/sector data found.")
-    st.stop()
+SECTOR_COLS = (
+    "track", "vehicle_number", "lap", "lap_number", "lap_time_s",
+    "s1_seconds", "s2_seconds", "s3_seconds",
+    "driver_name", "team", "class", "group",
+)
 
-if "track" not in sectors.columns or "vehicle_number" not in sectors.columns:
-    st.error("Sector data missing columns.")
-    st.stop()
+
+@st.cache_data(ttl=3600, max_entries=128, show_spinner=False)
+def car_lap_df(track, car_number):
+    """Cleaned per-lap table for one car, cached per (track, car)."""
+    sectors_df = load_sectors(track, SECTOR_COLS, cars=(car_number,))
+    return build_car_lap_df(sectors_df, car_number)
+
+
+@st.cache_data(ttl=3600, show_spinner=False)
+def car_meta_for(track):
+    """Per-car lap count + first driver/team name for the car picker."""
+    track_sec = load_sectors(track, SECTOR_COLS)
+    # "first" already skips NaN, so the per-group dropna lambdas are not
+    # needed and the whole aggregation stays on the Cython path
+    car_meta = (
+        track_sec.groupby("vehicle_number")
+        .agg(
+            laps=("lap", "count") if "lap" in track_sec.columns else ("lap_time_s", "count"),
+            driver_name=("driver_name", "first"),
+            team=("team", "first"),
+        )
+        .fillna({"driver_name": "", "team": ""})
+        .reset_index()
+    )
+    return car_meta.sort_values("vehicle_number")
 
 
 # ---------------------------------------------------------
 # Track selection
 # ---------------------------------------------------------
 track = st.selectbox("Select Track", meta.get_tracks())
-track_sec = sectors[sectors["track"] == track].copy()
+track_sec = load_sectors(track, SECTOR_COLS)
 
 if track_sec.empty:
     st.error(f"No data for track {track}.")
     st.stop()
 
+if "vehicle_number" not in track_sec.columns:
+    st.error("Sector data missing columns.")
+    st.stop()
+
 
 # ---------------------------------------------------------
 # Car + Driver selection
 # ---------------------------------------------------------
-car_meta = (
-    track_sec.groupby("vehicle_number")
-    .agg(
-        laps=("lap", "count") if "lap" in track_sec.columns else ("lap_time_s", "count"),
-        driver_name=("driver_name", lambda x: x.dropna().iloc[0] if len(x.dropna()) else ""),
-        team=("team", lambda x: x.dropna().iloc[0] if len(x.dropna()) else "")
-    )
-    .reset_index()
-)
-
-car_meta = car_meta.sort_values("vehicle_number")
+car_meta = car_meta_for(track)
 
 def build_label(row):
     label = f"#{int(row['vehicle_number'])}"
@@ -200,6 +262,9 @@ def build_label(row):
 
 car_meta["label"] = car_meta.apply(build_label, axis=1)
 
+# Car → display label, built once and reused by every chart below
+label_map = dict(zip(car_meta["vehicle_number"], car_meta["label"]))
+
 options = car_meta["label"].tolist()
 default = options[:2] if len(options) >= 2 else options
 
@@ -223,7 +288,7 @@ selected_cars = selected_meta["vehicle_number"].tolist()
 # ---------------------------------------------------------
 car_dfs = {}
 for car in selected_cars:
-    df_car = build_car_lap_df(sectors, track, car)
+    df_car = car_lap_df(track, car)
     if not df_car.empty:
         car_dfs[car] = df_car
 
@@ -237,27 +302,32 @@ if not car_dfs:
 # ---------------------------------------------------------
 section_header(f"Race Summary — {track}")
 
-rows = []
-for car, dfc in car_dfs.items():
-    best = dfc["lap_time_s"].min()
-    avg = dfc["lap_time_s"].mean()
-    med = dfc["lap_time_s"].median()
-    laps = dfc["lap_number"].max()
-
-    driver = dfc.get("driver_name", pd.Series([""])).iloc[0]
-    team = dfc.get("team", pd.Series([""])).iloc[0]
-
-    rows.append({
-        "Car #": int(car),
-        "Driver": driver,
-        "Team": team,
-        "Laps": laps,
-        "Best Lap (s)": round(best, 3),
-        "Avg Lap (s)": round(avg, 3),
-        "Median Lap (s)": round(med, 3),
-    })
+# All selected cars in one frame, aggregated in a single groupby
+# (sort=False keeps the selection order)
+all_laps = pd.concat(car_dfs.values(), ignore_index=True)
+for col in ["driver_name", "team"]:
+    if col not in all_laps.columns:
+        all_laps[col] = ""
 
-summary_df = pd.DataFrame(rows)
+summary_df = (
+    all_laps.groupby("vehicle_number", sort=False)
+    .agg(
+        Driver=("driver_name", "first"),
+        Team=("team", "first"),
+        Laps=("lap_number", "max"),
+        best=("lap_time_s", "min"),
+        avg=("lap_time_s", "mean"),
+        med=("lap_time_s", "median"),
+    )
+    .round({"best": 3, "avg": 3, "med": 3})
+    .rename(columns={
+        "best": "Best Lap (s)",
+        "avg": "Avg Lap (s)",
+        "med": "Median Lap (s)",
+    })
+    .reset_index()
+)
+summary_df.insert(0, "Car #", summary_df.pop("vehicle_number").astype(int))
 st.dataframe(summary_df, use_container_width=True)
 
 
@@ -266,28 +336,18 @@ st.dataframe(summary_df, use_container_width=True)
 # ---------------------------------------------------------
 section_header("Lap Time Trend Comparison")
 
-trend = []
-for car, dfc in car_dfs.items():
-    label = f"#{int(car)}"
-    if "driver_name" in dfc.columns and dfc["driver_name"].dropna().size > 0:
-        label += f" – {dfc['driver_name'].dropna().iloc[0]}"
-    tmp = dfc[["lap_number", "lap_time_s"]].copy()
-    tmp["car_label"] = label
-    trend.append(tmp)
-
-trend_df = pd.concat(trend, ignore_index=True)
-
-fig_trend = px.line(
-    trend_df,
-    x="lap_number",
-    y="lap_time_s",
-    color="car_label",
-    markers=True,
-    color_discrete_sequence=[PRIMARY_RED, DARK_GRAY, BLACK],
+# One plotting frame for the trend / cumulative / distribution charts.
+# all_laps is already in selection order with each car's laps sorted,
+# so the running total is a single grouped cumsum.
+plot_df = all_laps.assign(
+    cum_time_s=all_laps.groupby("vehicle_number", sort=False)["lap_time_s"].cumsum(),
+    car_label=all_laps["vehicle_number"].map(label_map),
 )
-fig_trend.update_layout(paper_bgcolor=WHITE, plot_bgcolor=WHITE, font=dict(color=BLACK))
 
-st.plotly_chart(fig_trend, use_container_width=True)
+st.plotly_chart(
+    pio.from_json(lap_line_fig_json(plot_df, "lap_time_s", markers=True)),
+    use_container_width=True,
+)
 
 
 # ---------------------------------------------------------
@@ -295,29 +355,10 @@ st.plotly_chart(fig_trend, use_container_width=True)
 # ---------------------------------------------------------
 section_header("Cumulative Race Time")
 
-cum_list = []
-for car, dfc in car_dfs.items():
-    dfc = dfc.sort_values("lap_number")
-    dfc["cum_time_s"] = dfc["lap_time_s"].cumsum()
-    label = f"#{int(car)}"
-    if "driver_name" in dfc.columns and dfc["driver_name"].dropna().size > 0:
-        label += f" – {dfc['driver_name'].dropna().iloc[0]}"
-    tmp = dfc[["lap_number", "cum_time_s"]].copy()
-    tmp["car_label"] = label
-    cum_list.append(tmp)
-
-cum_df = pd.concat(cum_list, ignore_index=True)
-
-fig_cum = px.line(
-    cum_df,
-    x="lap_number",
-    y="cum_time_s",
-    color="car_label",
-    color_discrete_sequence=[PRIMARY_RED, DARK_GRAY, BLACK],
+st.plotly_chart(
+    pio.from_json(lap_line_fig_json(plot_df, "cum_time_s")),
+    use_container_width=True,
 )
-fig_cum.update_layout(paper_bgcolor=WHITE, plot_bgcolor=WHITE, font=dict(color=BLACK))
-
-st.plotly_chart(fig_cum, use_container_width=True)
 
 
 # ---------------------------------------------------------
@@ -325,27 +366,7 @@ st.plotly_chart(fig_cum, use_container_width=True)
 # ---------------------------------------------------------
 section_header("Lap Time Distribution")
 
-box_list = []
-for car, dfc in car_dfs.items():
-    label = f"#{int(car)}"
-    if "driver_name" in dfc.columns and dfc["driver_name"].dropna().size > 0:
-        label += f" – {dfc['driver_name'].dropna().iloc[0]}"
-    tmp = dfc[["lap_time_s"]].copy()
-    tmp["car_label"] = label
-    box_list.append(tmp)
-
-box_df = pd.concat(box_list, ignore_index=True)
-
-fig_box = px.box(
-    box_df,
-    x="car_label",
-    y="lap_time_s",
-    points="all",
-    color_discrete_sequence=[PRIMARY_RED, DARK_GRAY, BLACK],
-)
-fig_box.update_layout(paper_bgcolor=WHITE, plot_bgcolor=WHITE, font=dict(color=BLACK))
-
-st.plotly_chart(fig_box, use_container_width=True)
+st.plotly_chart(pio.from_json(lap_box_fig_json(plot_df)), use_container_width=True)
 
 
 # ---------------------------------------------------------
@@ -353,36 +374,24 @@ st.plotly_chart(fig_box, use_container_width=True)
 # ---------------------------------------------------------
 section_header("Sector Average Comparison")
 
-sector_rows = []
-for car, dfc in car_dfs.items():
-    if not {"s1_seconds", "s2_seconds", "s3_seconds"}.issubset(dfc.columns):
-        continue
-
-    lbl = f"#{int(car)}"
-    if "driver_name" in dfc.columns and dfc["driver_name"].dropna().size > 0:
-        lbl += f" – {dfc['driver_name'].dropna().iloc[0]}"
-
-    sector_rows.extend([
-        {"car_label": lbl, "sector": "S1", "time_s": dfc["s1_seconds"].mean()},
-        {"car_label": lbl, "sector": "S2", "time_s": dfc["s2_seconds"].mean()},
-        {"car_label": lbl, "sector": "S3", "time_s": dfc["s3_seconds"].mean()},
-    ])
-
-if sector_rows:
-    sec_df = pd.DataFrame(sector_rows)
-    sec_df["time_s"] = sec_df["time_s"].round(3)
-
-    fig_sector = px.bar(
-        sec_df,
-        x="sector",
-        y="time_s",
-        color="car_label",
-        barmode="group",
-        color_discrete_sequence=[PRIMARY_RED, DARK_GRAY, BLACK],
-    )
-    fig_sector.update_layout(paper_bgcolor=WHITE, plot_bgcolor=WHITE, font=dict(color=BLACK))
+# One groupby over all selected cars' laps (build_car_lap_df always
+# emits the three sector columns)
+sector_means = (
+    all_laps.groupby("vehicle_number", sort=False)[["s1_seconds", "s2_seconds", "s3_seconds"]]
+    .mean()
+    .round(3)
+)
+sec_df = (
+    sector_means.set_axis(["S1", "S2", "S3"], axis=1)
+    .rename(index=label_map)
+    .rename_axis("car_label")
+    .reset_index()
+    .melt(id_vars="car_label", var_name="sector", value_name="time_s")
+)
+has_sectors = sec_df["time_s"].notna().any()
 
-    st.plotly_chart(fig_sector, use_container_width=True)
+if has_sectors:
+    st.plotly_chart(pio.from_json(sector_bar_fig_json(sec_df)), use_container_width=True)
 
     st.dataframe(
         sec_df.pivot(index="car_label", columns="sector", values="time_s")
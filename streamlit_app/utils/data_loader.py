@@ -1,9 +1,31 @@
 # streamlit_app/utils/data_loader.py
 
+import duckdb
 import pandas as pd
+import pyarrow.parquet as pq
 import json
+from concurrent.futures import ThreadPoolExecutor
 import streamlit as st
 from huggingface_hub import hf_hub_download
+from huggingface_hub.errors import EntryNotFoundError, LocalEntryNotFoundError
+
+from utils.track_meta import TrackMeta
+
+
+# Narrow dtypes for sector columns: timings/speeds fit float32, lap
+# counters int16, car numbers a nullable Int16
+SECTOR_DTYPES = {
+    "s1_seconds": "float32",
+    "s2_seconds": "float32",
+    "s3_seconds": "float32",
+    "lap_time_s": "float32",
+    "speed_kph": "float32",
+    "lap_improvement": "float32",
+    "pit_time": "float32",
+    "lap": "int16",
+    "lap_number": "int16",
+    "vehicle_number": "Int16",
+}
 
 
 class DataLoader:
@@ -26,8 +48,12 @@ class DataLoader:
             "weather": "weather.parquet",
             "sectors": "sectors.parquet",
             "bestlaps": "bestlaps.parquet",
+            "sector_summary": "sector_summary.parquet",
         }
 
+        # Tables the pages can do without (they fall back to raw data)
+        self.optional = {"sector_summary"}
+
     @st.cache_data(show_spinner=True)
     def _download(_, repo_id, filename, repo_type, cache_dir):
         """
@@ -41,30 +67,194 @@ class DataLoader:
             cache_dir=cache_dir
         )
 
-    def _load_parquet(self, fname):
+    @st.cache_data(show_spinner=True)
+    def _download_optional(_, repo_id, filename, repo_type, cache_dir):
         """
-        Download → read parquet
+        Like _download, but a file that isn't published in the dataset repo
+        returns None. The None is cached (a raised error would not be), so
+        a missing optional file costs one Hub lookup, not one per rerun.
+        Being offline without a cached copy still raises.
         """
-        local_path = self._download(
+        try:
+            return hf_hub_download(
+                repo_id=repo_id,
+                filename=filename,
+                repo_type=repo_type,
+                cache_dir=cache_dir
+            )
+        except LocalEntryNotFoundError:
+            raise
+        except EntryNotFoundError:
+            return None
+
+    def _local_path(self, fname, optional=False):
+        """
+        Cached download → local parquet path (None for a missing optional file)
+        """
+        download = self._download_optional if optional else self._download
+        return download(
             self.repo_id,
             fname,
             self.repo_type,
             self.cache_dir
         )
-        return pd.read_parquet(local_path)
+
+    def load_track_slice(self, track, kind):
+        """
+        Read a single track's rows of one dataset.
+        The track filter is pushed into the parquet reader, so row groups
+        whose min/max statistics exclude the track are never decoded.
+        The file is memory-mapped, so only the pages of the row groups
+        that survive the filter are faulted in.
+        Returns None if `kind` is an optional table that isn't published.
+        """
+        path = self._local_path(self.files[kind], optional=kind in self.optional)
+        if path is None:
+            return None
+
+        table = pq.read_table(
+            path,
+            filters=[("track", "=", track)],
+            memory_map=True,
+        )
+        return self._to_pandas(table)
+
+    @staticmethod
+    def _to_pandas(table):
+        """
+        Arrow table → DataFrame with dictionary-encoded columns (the ETL
+        writes track as a categorical) turned back into plain object
+        columns. Categoricals reject new values, so page code such as
+        fillna("–") would otherwise raise on them.
+        """
+        df = table.to_pandas()
+        cats = df.select_dtypes(include="category").columns
+        if len(cats):
+            df = df.astype({col: object for col in cats})
+        return df
+
+    def load_sectors(self, track, columns=None, cars=None):
+        """
+        One track's sector rows, optionally projected to `columns` and
+        restricted to the car numbers in `cars`.
+        DuckDB pushes the predicates and the column list into the parquet
+        scan; requested columns missing from the file are skipped.
+        """
+        path = self._local_path(self.files["sectors"])
+        available = pq.read_schema(path).names
+        if columns is None:
+            columns = available
+        columns = [c for c in columns if c in available]
+        if not columns or "track" not in available:
+            return pd.DataFrame(columns=columns)
+
+        where, params = "track = ?", [track]
+        if cars is not None and "vehicle_number" in available:
+            cars = [c.item() if hasattr(c, "item") else c for c in cars]
+            if not cars:
+                return pd.DataFrame(columns=columns)
+            where += f" AND vehicle_number IN ({', '.join('?' * len(cars))})"
+            params += cars
+
+        select = ", ".join(f'"{c}"' for c in columns)
+        source = path.replace("'", "''")
+        df = duckdb.execute(
+            f"SELECT {select} FROM read_parquet('{source}') WHERE {where}",
+            params,
+        ).fetch_df()
+        return self._narrow_sector_dtypes(df)
+
+    @staticmethod
+    def _narrow_sector_dtypes(df):
+        """
+        Apply SECTOR_DTYPES where the stored column allows it: half the
+        bytes for every scan the pages do. Float targets only take float
+        columns, int16 only null-free int columns, and non-numeric
+        columns are left untouched.
+        """
+        casts = {}
+        for col, dtype in SECTOR_DTYPES.items():
+            if col not in df.columns:
+                continue
+            kind = df[col].dtype.kind
+            if dtype == "float32" and kind == "f":
+                casts[col] = dtype
+            elif dtype == "int16" and kind in "iu":
+                casts[col] = dtype
+            elif dtype == "Int16" and kind in "iuf":
+                df[col] = df[col].round()
+                casts[col] = dtype
+        return df.astype(casts) if casts else df
 
     def load_all(self):
         """
-        Load every dataset your dashboard uses.
+        Load every dataset your dashboard uses as DataFrames.
+        """
+        return {key: self._to_pandas(table) for key, table in self.load_all_tables().items()}
+
+    def load_all_tables(self):
+        """
+        Load every dataset as an Arrow table.
+        Downloads stay on the script thread (cached st call); the parquet
+        reads are independent, so they overlap I/O + decompression in a pool.
         """
-        return {
-            key: self._load_parquet(fname)
+        # sector_summary is only ever read per track (load_track_slice)
+        paths = {
+            key: self._local_path(fname)
             for key, fname in self.files.items()
+            if key != "sector_summary"
         }
 
+        with ThreadPoolExecutor(max_workers=len(paths)) as pool:
+            futures = {
+                key: pool.submit(
+                    pq.read_table, path, memory_map=True, pre_buffer=True, use_threads=True
+                )
+                for key, path in paths.items()
+            }
+            return {key: fut.result() for key, fut in futures.items()}
+
     def load_track_metadata(self):
         """
         Track metadata remains local (small JSON file).
         """
         with open("track_config/track_metadata.json", "r") as f:
             return json.load(f)
+
+
+# ---------------------------------------------------------
+# Cached entry points used by the pages
+# ---------------------------------------------------------
+@st.cache_data(show_spinner=False, ttl=3600)
+def load_all_data():
+    """
+    Parquet decode + DataFrame construction once per process,
+    not on every widget interaction. Refreshed hourly so a republished
+    dataset is picked up without a restart.
+    """
+    return DataLoader().load_all()
+
+
+@st.cache_data(show_spinner=False)
+def load_track_data(track, kind):
+    """
+    Cached per-track slice of a dataset (laps, sectors, weather, ...).
+    None for an optional table (sector_summary) missing from the dataset.
+    """
+    return DataLoader().load_track_slice(track, kind)
+
+
+@st.cache_data(show_spinner=False)
+def load_sectors(track, columns=None, cars=None):
+    """
+    Cached per-track (and optionally per-car), column-projected sectors frame.
+    """
+    return DataLoader().load_sectors(track, columns, cars)
+
+
+@st.cache_resource
+def load_track_meta():
+    """
+    Shared TrackMeta built once from the local metadata JSON.
+    """
+    return TrackMeta(DataLoader().load_track_metadata())
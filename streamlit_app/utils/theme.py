@@ -1,67 +1,21 @@
-import streamlit as st
-
-def apply_toyota_theme():
-    """Injects global Toyota styling into the Streamlit app."""
-
-    st.markdown(
-        """
-        <style>
-            /* Light Mode Override */
-            :root {
-                --primary-color: #EB0A1E; /* Toyota Red */
-                --text-color: #000000;
-                --background-color: #FFFFFF;
-                --secondary-background-color: #F5F5F5;
-            }
+import os
 
-            /* Global background */
-            .main {
-                background-color: #FFFFFF !important;
-            }
-
-            /* Sidebar styling */
-            section[data-testid="stSidebar"] {
-                background-color: #000000 !important;  /* black */
-            }
+import streamlit as st
 
-            /* Sidebar text to white */
-            section[data-testid="stSidebar"] * {
-                color: #FFFFFF !important;
-            }
+CSS_PATH = os.path.join(os.path.dirname(__file__), "..", "static", "theme.css")
 
-            /* Header */
-            header[data-testid="stHeader"] {
-                background-color: #FFFFFF !important;
-            }
-            header[data-testid="stHeader"] * {
-                color: #000000 !important;
-            }
 
-            /* Remove weird borders */
-            div[data-testid="stSidebarNav"] {
-                border-right: none !important;
-            }
+@st.cache_resource(show_spinner=False)
+def load_css(path=CSS_PATH):
+    """Read the global stylesheet once per process, wrapped in its <style> tag."""
+    with open(path, "r") as f:
+        return f"<style>{f.read()}</style>"
 
-            /* Buttons in Toyota red */
-            .stButton>button {
-                background-color: #EB0A1E !important;
-                color: white !important;
-                border-radius: 6px;
-                border: none;
-                font-weight: bold;
-            }
 
-            /* Selectbox label color fix */
-            .stSelectbox label, .stMultiSelect label {
-                color: #000000 !important;
-            }
+def apply_toyota_theme():
+    """Injects global Toyota styling into the Streamlit app."""
 
-            /* DataFrames border styling */
-            .stDataFrame {
-                border: 2px solid #58595B !important;  /* Toyota Gray */
-                border-radius: 6px;
-            }
-        </style>
-        """,
-        unsafe_allow_html=True,
-    )
+    # Emitted on every rerun: Streamlit drops elements a rerun doesn't
+    # re-send, so a session-state "already applied" guard would unstyle
+    # the page after the first interaction.
+    st.markdown(load_css(), unsafe_allow_html=True)
@@ -1,7 +1,11 @@
 # track_config/builder.py
 
+import glob
+import hashlib
 import json
 import os
+from concurrent.futures import ProcessPoolExecutor
+
 import numpy as np
 
 from detect_sectors import SectorDetector
@@ -9,6 +13,11 @@ from detect_corners import CornerDetector
 from detect_braking_points import BrakingPointDetector
 
 
+CACHE_DIR = os.path.join(".cache", "track_config")
+
+# detect_corners() parameters (its defaults); part of the cache key
+CORNER_PARAMS = {"steering_threshold": 5, "min_segment": 8}
+
 TRACKS = [
     "sonoma",
     "indy",
@@ -38,27 +47,90 @@ def to_native(obj):
     return obj
 
 
-class TrackConfigBuilder:
-    def __init__(self):
-        self.sector_detector = SectorDetector()
-        self.corner_detector = CornerDetector()
-        self.brake_detector = BrakingPointDetector()
+# Per-process detectors, created once by the pool initializer and reused
+# for every track that worker builds (DuckDB connections don't pickle)
+_detectors = {}
+
+
+def _init_worker():
+    _detectors["sectors"] = SectorDetector()
+    _detectors["corners"] = CornerDetector()
+    _detectors["braking"] = BrakingPointDetector()
 
-    def build(self):
-        metadata = {}
 
-        for track in TRACKS:
-            print(f"🛠 Building metadata for {track}...")
+def _cached(name, track, paths, detector, detect, **params):
+    """
+    Detector result memoized on disk. The key covers the detector name
+    and CACHE_VERSION, the track, the detect() parameters and every input
+    parquet file's path + mtime + size, so changed code, parameters or any
+    replaced file (even an older one) misses. Unchanged inputs skip the
+    DuckDB scan entirely. Inputs that don't exist are never cached.
+    """
+    paths = sorted(p for p in paths if os.path.exists(p))
+    if not paths:
+        return detect(track, **params)
+
+    stamp = json.dumps({
+        "detector": name,
+        "version": detector.CACHE_VERSION,
+        "track": track,
+        "params": params,
+        "files": [(p, os.path.getmtime(p), os.path.getsize(p)) for p in paths],
+    }, sort_keys=True)
+    key = hashlib.md5(stamp.encode()).hexdigest()
+    cache_file = os.path.join(CACHE_DIR, f"{name}_{track}_{key}.json")
+
+    if os.path.exists(cache_file):
+        with open(cache_file, "r") as f:
+            return json.load(f)
+
+    result = to_native(detect(track, **params))
+    os.makedirs(CACHE_DIR, exist_ok=True)
+    with open(cache_file, "w") as f:
+        json.dump(result, f)
+    return result
+
+
+def _build_one(track):
+    """
+    Metadata for a single track, built in a worker process.
+    """
+    print(f"🛠 Building metadata for {track}...")
+
+    sectors = _detectors["sectors"]
+    corners = _detectors["corners"]
+    braking = _detectors["braking"]
+
+    return {
+        "sectors": _cached(
+            "sectors", track, [sectors.parquet_path],
+            sectors, sectors.detect_sectors,
+        ),
+        "corners": _cached(
+            "corners", track,
+            glob.glob(os.path.join(corners.telemetry_folder, f"telemetry_{track}_*.parquet")),
+            corners, corners.detect_corners,
+            **CORNER_PARAMS,
+        ),
+        "braking_points": _cached(
+            "braking", track,
+            glob.glob(os.path.join(braking.telemetry_folder, f"telemetry_{track}_*.parquet")),
+            braking, braking.detect_braking_points,
+        ),
+    }
 
-            sectors = self.sector_detector.detect_sectors(track)
-            corners = self.corner_detector.detect_corners(track)
-            braking_points = self.brake_detector.detect_braking_points(track)
 
-            metadata[track] = {
-                "sectors": sectors,
-                "corners": corners,
-                "braking_points": braking_points,
-            }
+class TrackConfigBuilder:
+    def __init__(self, max_workers=None):
+        self.max_workers = max_workers or min(len(TRACKS), os.cpu_count() or 1)
+
+    def build(self):
+        # Tracks are independent (each one is its own telemetry scan +
+        # pivot), so they are built side by side in a process pool
+        with ProcessPoolExecutor(max_workers=self.max_workers, initializer=_init_worker) as pool:
+            futures = {track: pool.submit(_build_one, track) for track in TRACKS}
+            # Collected in TRACKS order so the JSON layout stays stable
+            metadata = {track: fut.result() for track, fut in futures.items()}
 
         # Convert all numpy types to native Python before JSON dump
         metadata_clean = to_native(metadata)
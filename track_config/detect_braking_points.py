@@ -1,14 +1,24 @@
 # track_config/detect_braking_points.py
 
 import duckdb
+import numpy as np
 import pandas as pd
 import os
 
 
 class BrakingPointDetector:
+    # Bump whenever the detection logic or its output changes: it is part
+    # of the builder's on-disk cache key
+    CACHE_VERSION = 2
+
     def __init__(self, telemetry_folder="data/processed"):
         self.telemetry_folder = telemetry_folder
 
+        # One connection per detector, reused for every track; the object
+        # cache keeps parquet footers/metadata between queries
+        self.con = duckdb.connect()
+        self.con.execute("PRAGMA enable_object_cache")
+
     def _load_track_telemetry(self, track_name: str) -> pd.DataFrame:
         """
         Load a LIGHT subset of telemetry for a given track:
@@ -18,20 +28,33 @@ class BrakingPointDetector:
         """
         pattern = os.path.join(self.telemetry_folder, f"telemetry_{track_name}_*.parquet")
 
+        # Long → wide pivot done in DuckDB with conditional aggregation.
+        # The 100k cap still applies to the long rows (inner subquery); the
+        # inner projection lets DuckDB read only the needed columns.
         query = f"""
-            SELECT *
+            SELECT
+                timestamp, lap, vehicle_number, track,
+                AVG(CASE WHEN name = 'speed' THEN value END) AS speed,
+                AVG(CASE WHEN name = 'accx_can' THEN value END) AS accx_can,
+                AVG(CASE WHEN name = 'pbrake_f' THEN value END) AS pbrake_f,
+                AVG(CASE WHEN name = 'pbrake_r' THEN value END) AS pbrake_r
             FROM (
                 SELECT
-                    *,
-                    lower(telemetry_name) AS telemetry_name_lower
+                    timestamp, lap, vehicle_number, track,
+                    lower(telemetry_name) AS name,
+                    TRY_CAST(telemetry_value AS DOUBLE) AS value
                 FROM read_parquet('{pattern}', union_by_name=True)
+                WHERE lower(telemetry_name) IN ('speed', 'accx_can', 'pbrake_f', 'pbrake_r')
+                LIMIT 100000
             )
-            WHERE telemetry_name_lower IN ('speed', 'accx_can', 'pbrake_f', 'pbrake_r')
-            LIMIT 100000
+            WHERE timestamp IS NOT NULL AND lap IS NOT NULL
+              AND vehicle_number IS NOT NULL AND track IS NOT NULL
+            GROUP BY timestamp, lap, vehicle_number, track
+            ORDER BY timestamp, lap, vehicle_number, track
         """
 
         try:
-            df = duckdb.query(query).df()
+            df = self.con.execute(query).df()
         except Exception as e:
             print(f"[BrakingPointDetector] DuckDB error for track={track_name}: {e}")
             return pd.DataFrame()
@@ -39,24 +62,16 @@ class BrakingPointDetector:
         if df.empty:
             return df
 
-        df_pivot = df.pivot_table(
-            index=["timestamp", "lap", "vehicle_number", "track"],
-            columns="telemetry_name_lower",
-            values="telemetry_value",
-            aggfunc="mean",
-        ).reset_index()
+        # Match pivot_table: drop rows / channels with no values at all
+        channels = ["speed", "accx_can", "pbrake_f", "pbrake_r"]
+        df = df.dropna(subset=channels, how="all")
+        df = df.drop(columns=[c for c in channels if df[c].isna().all()])
 
         # Convert timestamp to epoch seconds if it is datetime
-        if pd.api.types.is_datetime64_any_dtype(df_pivot["timestamp"]):
-            df_pivot["timestamp"] = df_pivot["timestamp"].astype("int64") / 1e9
-
-        # Ensure numeric
-        for col in ["speed", "accx_can", "pbrake_f", "pbrake_r"]:
-            if col in df_pivot.columns:
-                df_pivot[col] = pd.to_numeric(df_pivot[col], errors="coerce")
+        if pd.api.types.is_datetime64_any_dtype(df["timestamp"]):
+            df["timestamp"] = df["timestamp"].astype("int64") / 1e9
 
-        df_pivot = df_pivot.sort_values("timestamp")
-        return df_pivot
+        return df.reset_index(drop=True)
 
     def detect_braking_points(self, track_name: str):
         """
@@ -73,34 +88,35 @@ class BrakingPointDetector:
             print(f"[BrakingPointDetector] No speed column for track={track_name}")
             return []
 
-        df["speed_diff"] = df["speed"].diff()
-
-        has_accx = "accx_can" in df.columns
-        has_f = "pbrake_f" in df.columns
-        has_r = "pbrake_r" in df.columns
-
         thr_drop = -4.0    # km/h per sample
         thr_acc = -0.2     # G
         thr_brake = 5.0    # bar
 
-        events = []
-
-        for i in range(1, len(df)):
-            row = df.iloc[i]
-            prev = df.iloc[i - 1]
-
-            cond1 = row["speed_diff"] < thr_drop if not pd.isna(row["speed_diff"]) else False
-            cond2 = has_accx and (row["accx_can"] < thr_acc if not pd.isna(row["accx_can"]) else False)
-            cond3 = has_f and (row["pbrake_f"] > thr_brake if not pd.isna(row["pbrake_f"]) else False)
-            cond4 = has_r and (row["pbrake_r"] > thr_brake if not pd.isna(row["pbrake_r"]) else False)
-
-            if cond1 or cond2 or cond3 or cond4:
-                events.append({
-                    "timestamp": float(row["timestamp"]),
-                    "lap": int(row["lap"]),
-                    "vehicle_number": row["vehicle_number"],
-                    "speed_before": float(prev["speed"]),
-                    "speed_after": float(row["speed"]),
-                })
-
-        return events
+        # One boolean mask over the whole frame; NaN compares False, so
+        # missing samples never trigger a condition (same as the old
+        # per-row pd.isna guards)
+        speed = df["speed"].to_numpy(dtype=float)
+        speed_diff = np.diff(speed, prepend=np.nan)
+
+        mask = speed_diff < thr_drop
+        if "accx_can" in df.columns:
+            mask |= df["accx_can"].to_numpy(dtype=float) < thr_acc
+        for col in ["pbrake_f", "pbrake_r"]:
+            if col in df.columns:
+                mask |= df[col].to_numpy(dtype=float) > thr_brake
+
+        # The first sample has no previous one to compare against
+        idx = np.flatnonzero(mask[1:]) + 1
+
+        # Bulk tolist() conversions (one C-level pass per column, already
+        # native Python types for json.dump); the list-of-dicts layout that
+        # TrackMeta / braking_heatmap read is kept
+        columns = {
+            "timestamp": df["timestamp"].to_numpy(dtype=float)[idx].tolist(),
+            "lap": df["lap"].to_numpy()[idx].astype(np.int64).tolist(),
+            "vehicle_number": df["vehicle_number"].to_numpy()[idx].tolist(),
+            "speed_before": speed[idx - 1].tolist(),
+            "speed_after": speed[idx].tolist(),
+        }
+        keys = list(columns)
+        return [dict(zip(keys, row)) for row in zip(*columns.values())]
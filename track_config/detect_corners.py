@@ -1,15 +1,25 @@
 # track_config/detect_corners.py
 
 import duckdb
+import numpy as np
 import pandas as pd
 import os
 
 
 class CornerDetector:
+    # Bump whenever the detection logic or its output changes: it is part
+    # of the builder's on-disk cache key
+    CACHE_VERSION = 2
+
     def __init__(self, telemetry_folder="data/processed"):
         # telemetry_{track}_*.parquet written by ETL
         self.telemetry_folder = telemetry_folder
 
+        # One connection per detector, reused for every track; the object
+        # cache keeps parquet footers/metadata between queries
+        self.con = duckdb.connect()
+        self.con.execute("PRAGMA enable_object_cache")
+
     def _load_track_telemetry(self, track_name: str) -> pd.DataFrame:
         """
         Load a LIGHTWEIGHT subset of telemetry for a given track:
@@ -19,21 +29,32 @@ class CornerDetector:
         """
         pattern = os.path.join(self.telemetry_folder, f"telemetry_{track_name}_*.parquet")
 
-        # DuckDB SQL; union_by_name=True handles missing columns between R1/R2 etc.
+        # Long → wide pivot done in DuckDB with conditional aggregation.
+        # The 100k cap still applies to the long rows (inner subquery); the
+        # inner projection lets DuckDB read only the needed columns.
         query = f"""
-            SELECT *
+            SELECT
+                timestamp, lap, vehicle_number, track,
+                AVG(CASE WHEN name = 'speed' THEN value END) AS speed,
+                AVG(CASE WHEN name = 'accy_can' THEN value END) AS accy_can,
+                AVG(CASE WHEN name = 'steering_angle' THEN value END) AS steering_angle
             FROM (
                 SELECT
-                    *,
-                    lower(telemetry_name) AS telemetry_name_lower
+                    timestamp, lap, vehicle_number, track,
+                    lower(telemetry_name) AS name,
+                    TRY_CAST(telemetry_value AS DOUBLE) AS value
                 FROM read_parquet('{pattern}', union_by_name=True)
+                WHERE lower(telemetry_name) IN ('speed', 'accy_can', 'steering_angle')
+                LIMIT 100000
             )
-            WHERE telemetry_name_lower IN ('speed', 'accy_can', 'steering_angle')
-            LIMIT 100000
+            WHERE timestamp IS NOT NULL AND lap IS NOT NULL
+              AND vehicle_number IS NOT NULL AND track IS NOT NULL
+            GROUP BY timestamp, lap, vehicle_number, track
+            ORDER BY timestamp, lap, vehicle_number, track
         """
 
         try:
-            df = duckdb.query(query).df()
+            df = self.con.execute(query).df()
         except Exception as e:
             print(f"[CornerDetector] DuckDB error for track={track_name}: {e}")
             return pd.DataFrame()
@@ -41,25 +62,16 @@ class CornerDetector:
         if df.empty:
             return df
 
-        # Pivot to wide format: one row per timestamp/lap/vehicle
-        df_pivot = df.pivot_table(
-            index=["timestamp", "lap", "vehicle_number", "track"],
-            columns="telemetry_name_lower",
-            values="telemetry_value",
-            aggfunc="mean",
-        ).reset_index()
-
-        # Ensure numeric timestamp (epoch seconds), not pandas.Timestamp
-        if pd.api.types.is_datetime64_any_dtype(df_pivot["timestamp"]):
-            df_pivot["timestamp"] = df_pivot["timestamp"].astype("int64") / 1e9
+        # Match pivot_table: drop rows / channels with no values at all
+        channels = ["speed", "accy_can", "steering_angle"]
+        df = df.dropna(subset=channels, how="all")
+        df = df.drop(columns=[c for c in channels if df[c].isna().all()])
 
-        # Ensure numeric telemetry columns
-        for col in ["speed", "accy_can", "steering_angle"]:
-            if col in df_pivot.columns:
-                df_pivot[col] = pd.to_numeric(df_pivot[col], errors="coerce")
+        # Convert timestamp to epoch seconds if it is datetime
+        if pd.api.types.is_datetime64_any_dtype(df["timestamp"]):
+            df["timestamp"] = df["timestamp"].astype("int64") / 1e9
 
-        df_pivot = df_pivot.sort_values("timestamp")
-        return df_pivot
+        return df.reset_index(drop=True)
 
     def detect_corners(self, track_name: str, steering_threshold=5, min_segment=8):
         """
@@ -77,37 +89,79 @@ class CornerDetector:
             print(f"[CornerDetector] Missing needed columns for track={track_name}")
             return []
 
-        corners = []
-        in_corner = False
-        start_idx = None
-
-        for i in range(len(df)):
-            angle = df.iloc[i]["steering_angle"]
-            lat_g = df.iloc[i]["accy_can"]
-
-            if pd.isna(angle) or pd.isna(lat_g):
-                continue
-
-            # Start of corner: big steering or lateral G
-            if not in_corner and (abs(angle) > steering_threshold or abs(lat_g) > 0.15):
-                in_corner = True
-                start_idx = i
-
-            # End of corner: steering & lat G drop back near zero
-            if in_corner and abs(angle) < 3 and abs(lat_g) < 0.1:
-                end_idx = i
-                if end_idx - start_idx > min_segment:
-                    seg = df.iloc[start_idx:end_idx]
-
-                    corners.append({
-                        "start_time": float(seg["timestamp"].min()),
-                        "end_time": float(seg["timestamp"].max()),
-                        "min_speed": float(seg["speed"].min()),
-                        "max_lateral_g": float(seg["accy_can"].abs().max()),
-                        "entry_speed": float(seg["speed"].iloc[0]),
-                        "exit_speed": float(seg["speed"].iloc[-1]),
-                        "lap": int(seg["lap"].iloc[0]),
-                    })
-                in_corner = False
-
-        return corners
+        starts, ends = self._scan_corners(
+            df["steering_angle"].to_numpy(dtype=float),
+            df["accy_can"].to_numpy(dtype=float),
+            steering_threshold,
+        )
+        keep = ends - starts > min_segment
+        starts, ends = starts[keep], ends[keep]
+        if starts.size == 0:
+            return []
+
+        # Per-segment aggregates over df rows [start, end): segments are
+        # disjoint and ordered, so reduceat over interleaved bounds gives
+        # every segment in one call (even slots; odd slots are the gaps).
+        # fmin/fmax skip NaN like the pandas min/max they replace.
+        bounds = np.column_stack([starts, ends]).ravel()
+        ts = df["timestamp"].to_numpy(dtype=float)
+        speed = df["speed"].to_numpy(dtype=float)
+        abs_lat = np.abs(df["accy_can"].to_numpy(dtype=float))
+
+        return [
+            {
+                "start_time": t0,
+                "end_time": t1,
+                "min_speed": v_min,
+                "max_lateral_g": g_max,
+                "entry_speed": v_in,
+                "exit_speed": v_out,
+                "lap": int(lap),
+            }
+            for t0, t1, v_min, g_max, v_in, v_out, lap in zip(
+                np.fmin.reduceat(ts, bounds)[::2].tolist(),
+                np.fmax.reduceat(ts, bounds)[::2].tolist(),
+                np.fmin.reduceat(speed, bounds)[::2].tolist(),
+                np.fmax.reduceat(abs_lat, bounds)[::2].tolist(),
+                speed[starts].tolist(),
+                speed[ends - 1].tolist(),
+                df["lap"].to_numpy()[starts].tolist(),
+            )
+        ]
+
+    @staticmethod
+    def _scan_corners(angle, lat_g, steering_threshold):
+        """
+        Corner start/end row positions from the in/out state machine:
+        a corner opens on the first sample with big steering or lateral G,
+        and closes on the next sample where both drop back near zero.
+        Rows with a missing angle or lateral G are ignored.
+
+        With steering_threshold < 3 a row can satisfy both conditions. The
+        row-by-row loop closes an open corner on such a row, and when no
+        corner is open it opens and closes on the same row, which gives an
+        empty segment that min_segment rejects. Either way the state ends up
+        "out", so those rows count as closes only. With that rule applied,
+        the state changes only on the first open after a close (or at the
+        start) and on the first close after an open. Those are exactly the
+        events that differ from the previous event, so no Python loop is
+        needed. A corner still open at the end is dropped, as before.
+        """
+        valid = ~(np.isnan(angle) | np.isnan(lat_g))
+        closes = valid & (np.abs(angle) < 3) & (np.abs(lat_g) < 0.1)
+        opens = (
+            valid
+            & ~closes
+            & ((np.abs(angle) > steering_threshold) | (np.abs(lat_g) > 0.15))
+        )
+
+        pos = np.flatnonzero(opens | closes)
+        is_open = opens[pos]
+        # the state starts "out", i.e. as if the previous event was a close
+        changed = is_open != np.concatenate(([False], is_open[:-1]))
+        pos, is_open = pos[changed], is_open[changed]
+
+        # events now alternate open/close, starting with an open
+        starts = pos[is_open]
+        ends = pos[~is_open]
+        return starts[:ends.size], ends
@@ -1,69 +1,84 @@
 # track_config/detect_sectors.py
 
 import duckdb
-import pandas as pd
 
 
 class SectorDetector:
+    # Bump whenever the detection logic or its output changes: it is part
+    # of the builder's on-disk cache key
+    CACHE_VERSION = 2
+
     def __init__(self, parquet_path="data/processed/sectors.parquet"):
         self.parquet_path = parquet_path
 
-        # Load once into memory via DuckDB → Pandas
-        self.df = duckdb.query(f"""
-            SELECT *
-            FROM read_parquet('{self.parquet_path}')
-        """).df()
+        # Nothing is loaded up front: each track's stats are aggregated by
+        # DuckDB straight from the parquet file (only the sector + track
+        # columns are read)
+        self.con = duckdb.connect()
+        self.con.execute("PRAGMA enable_object_cache")
+        self.source = "read_parquet('{}')".format(self.parquet_path.replace("'", "''"))
+
+        # Column names are matched case-insensitively, as the ETL lowercases them
+        names = [row[0] for row in self.con.execute(f"DESCRIBE SELECT * FROM {self.source}").fetchall()]
+        self.columns = {name.lower(): name for name in names}
 
-        # Make sure column names are lowercased to match the ETL
-        self.df.columns = [c.lower() for c in self.df.columns]
+        self.sector_cols = [
+            self._resolve_col(["s1_seconds", "s1"]),
+            self._resolve_col(["s2_seconds", "s2"]),
+            self._resolve_col(["s3_seconds", "s3"]),
+        ]
 
-    def _get_numeric_col(self, df, candidates):
+    def _resolve_col(self, candidates):
         """
-        Try multiple candidate column names and return a numeric Series.
+        Try multiple candidate column names and return the stored name.
         """
         for name in candidates:
-            if name in df.columns:
-                return pd.to_numeric(df[name], errors="coerce")
+            if name in self.columns:
+                return self.columns[name]
         return None
 
+    def _query_stats(self, track_name):
+        """
+        (row count, then avg/std/min/max per sector) for one track in a
+        single aggregate query. TRY_CAST turns non-numeric values into NULL,
+        like pd.to_numeric(errors="coerce"); STDDEV_SAMP matches pandas' std.
+        """
+        aggs = []
+        for col in self.sector_cols:
+            val = f'TRY_CAST("{col}" AS DOUBLE)'
+            aggs += [f"AVG({val})", f"STDDEV_SAMP({val})", f"MIN({val})", f"MAX({val})"]
+
+        return self.con.execute(
+            f"SELECT COUNT(*), {', '.join(aggs)} FROM {self.source} WHERE track = ?",
+            [track_name],
+        ).fetchone()
+
     def detect_sectors(self, track_name: str):
         """
         Returns a dict with sector timing stats + distance ratio
         for S1/S2/S3 on a given track.
         """
-        track_df = self.df[self.df["track"] == track_name]
-
-        if track_df.empty:
+        if any(col is None for col in self.sector_cols):
+            # Missing some sector data; return what we can
             return None
 
-        s1_series = self._get_numeric_col(track_df, ["s1_seconds", "s1"])
-        s2_series = self._get_numeric_col(track_df, ["s2_seconds", "s2"])
-        s3_series = self._get_numeric_col(track_df, ["s3_seconds", "s3"])
+        n_rows, *stats = self._query_stats(track_name)
 
-        if s1_series is None or s2_series is None or s3_series is None:
-            # Missing some sector data; return what we can
+        if n_rows == 0:
             return None
 
-        sector_summary = {
-            "S1": {
-                "avg_time": float(s1_series.mean()),
-                "std_time": float(s1_series.std()),
-                "min": float(s1_series.min()),
-                "max": float(s1_series.max())
-            },
-            "S2": {
-                "avg_time": float(s2_series.mean()),
-                "std_time": float(s2_series.std()),
-                "min": float(s2_series.min()),
-                "max": float(s2_series.max())
-            },
-            "S3": {
-                "avg_time": float(s3_series.mean()),
-                "std_time": float(s3_series.std()),
-                "min": float(s3_series.min()),
-                "max": float(s3_series.max())
-            },
-        }
+        # NULL aggregates (no numeric values) become NaN, as in pandas
+        stats = [float("nan") if v is None else float(v) for v in stats]
+
+        sector_summary = {}
+        for i, s in enumerate(["S1", "S2", "S3"]):
+            avg, std, lo, hi = stats[4 * i:4 * i + 4]
+            sector_summary[s] = {
+                "avg_time": avg,
+                "std_time": std,
+                "min": lo,
+                "max": hi,
+            }
 
         total = (
             sector_summary["S1"]["avg_time"]
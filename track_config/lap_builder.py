@@ -1,3 +1,4 @@
+import duckdb
 import pandas as pd
 import os
 
@@ -5,56 +6,49 @@ START_PATH = "data/processed/lap_start.parquet"
 END_PATH   = "data/processed/lap_end.parquet"
 OUTPUT     = "data/processed/laps_real.parquet"
 
-print("🔧 Loading start/end lap data...")
-
-df_start = pd.read_parquet(START_PATH)
-df_end   = pd.read_parquet(END_PATH)
-
-# Convert timestamps
-df_start["timestamp"] = pd.to_datetime(df_start["timestamp"])
-df_end["timestamp"]   = pd.to_datetime(df_end["timestamp"])
-
-print("⏱ Merging start/end lap records...")
-
-# Merge on fields that uniquely identify a lap
+# Fields that uniquely identify a lap
 merge_cols = ["track", "vehicle_id", "outing", "lap"]
 
-df = df_start.merge(
-    df_end,
-    on=merge_cols,
-    how="inner",
-    suffixes=("_start", "_end")
-)
+print("⏱ Joining start/end lap records (DuckDB)...")
 
-print(f"➡️ Merged rows: {len(df)}")
+# Some lap files may not contain vehicle_number
+start_cols = [row[0] for row in duckdb.execute(
+    f"DESCRIBE SELECT * FROM read_parquet('{START_PATH}')"
+).fetchall()]
+vehicle_number = "s.vehicle_number" if "vehicle_number" in start_cols else "NULL"
+
+# The join runs in DuckDB on just the key + timestamp columns, instead of
+# reading both files into pandas and hash-merging the full frames.
+# IS NOT DISTINCT FROM keeps pandas' merge semantics (missing keys match).
+join_on = " AND ".join(f"s.{c} IS NOT DISTINCT FROM e.{c}" for c in merge_cols)
+df = duckdb.execute(f"""
+    SELECT
+        s.track, s.vehicle_id, {vehicle_number} AS vehicle_number, s.outing, s.lap,
+        s.timestamp AS start_time,
+        e.timestamp AS end_time
+    FROM read_parquet('{START_PATH}') AS s
+    JOIN read_parquet('{END_PATH}') AS e
+      ON {join_on}
+""").fetch_df()
 
-# Compute lap time
-df["lap_time_s"] = (df["timestamp_end"] - df["timestamp_start"]).dt.total_seconds()
-
-# Clean up the DataFrame
-final_cols = [
-    "track",
-    "vehicle_id",
-    "vehicle_number_start",
-    "outing",
-    "lap",
-    "timestamp_start",
-    "timestamp_end",
-    "lap_time_s",
-]
+print(f"➡️ Merged rows: {len(df)}")
 
-# Some lap files may not contain vehicle_number
-if "vehicle_number_start" not in df.columns:
-    df["vehicle_number_start"] = None
+# Timestamps are stored as text by the ETL; pandas' parser is kept so the
+# accepted formats don't change
+df["start_time"] = pd.to_datetime(df["start_time"])
+df["end_time"]   = pd.to_datetime(df["end_time"])
 
-df_final = df[final_cols].rename(columns={
-    "vehicle_number_start": "vehicle_number",
-    "timestamp_start": "start_time",
-    "timestamp_end": "end_time"
-})
+# Compute lap time
+df["lap_time_s"] = (df["end_time"] - df["start_time"]).dt.total_seconds()
 
 # Drop invalid or negative laps
-df_final = df_final[df_final["lap_time_s"] > 0]
+df_final = df[df["lap_time_s"] > 0]
+
+# Narrow dtypes so parquet pages (and every reader) stay small
+df_final = df_final.assign(
+    lap=pd.to_numeric(df_final["lap"], errors="coerce", downcast="integer"),
+    lap_time_s=df_final["lap_time_s"].astype("float32"),
+)
 
 print("💾 Saving:", OUTPUT)
 df_final.to_parquet(OUTPUT, index=False)
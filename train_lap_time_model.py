@@ -4,11 +4,14 @@ import os
 import joblib
 import numpy as np
 import pandas as pd
-from sklearn.ensemble import RandomForestRegressor
+from sklearn.ensemble import HistGradientBoostingRegressor
 
 from models.lap_time_features import prepare_lap_features, get_feature_target_split
 
 PROCESSED_LAPS = "data/processed/laps_real.parquet"
+# Per-track models are build artifacts (models/lap_time_<track>.pkl) and are
+# not checked in; run `python train_lap_time_model.py` to (re)generate them
+# whenever this script or models/lap_time_features.py changes.
 MODELS_DIR = "models"
 
 
@@ -22,25 +25,30 @@ def train_per_track():
     print("🧱 Building features...")
     feat_df = prepare_lap_features(laps)
 
-    tracks = sorted(feat_df["track"].unique())
-    print("Tracks detected:", tracks)
+    # One pass over the (categorical) track codes instead of a string
+    # mask per track
+    by_track = feat_df.groupby("track", sort=True, observed=True)
+    print("Tracks detected:", list(by_track.groups))
 
-    for track in tracks:
+    for track, df_track in by_track:
         print(f"\n🏁 Training model for track: {track}")
-        df_track = feat_df[feat_df["track"] == track].copy()
 
         if len(df_track) < 50:
             print(f"⚠️ Not enough data for track {track}, skipping ({len(df_track)} rows).")
             continue
 
-        X, y, feature_cols = get_feature_target_split(df_track)
-
-        # Simple baseline model
-        model = RandomForestRegressor(
-            n_estimators=200,
-            max_depth=None,
+        X, y, feature_cols, vehicle_categories = get_feature_target_split(df_track)
+
+        # Histogram gradient boosting: features binned to uint8, vehicle_id
+        # handled natively as a categorical (no one-hot block)
+        model = HistGradientBoostingRegressor(
+            max_iter=300,
+            learning_rate=0.05,
+            max_bins=255,
+            categorical_features=[feature_cols.index("vehicle_id")],
+            early_stopping=True,
+            validation_fraction=0.15,
             random_state=42,
-            n_jobs=-1,
         )
 
         model.fit(X, y)
@@ -51,10 +59,13 @@ def train_per_track():
         artifact = {
             "model": model,
             "feature_cols": feature_cols,
+            "vehicle_categories": vehicle_categories,
         }
 
         out_path = os.path.join(MODELS_DIR, f"lap_time_{track}.pkl")
-        joblib.dump(artifact, out_path)
+        # Protocol 5 pickles the model's NumPy arrays without an extra
+        # bytes copy; uncompressed so ModelLoader can load it straight back
+        joblib.dump(artifact, out_path, protocol=5, compress=0)
         print(f"💾 Saved model → {out_path}")
 
 
@@ -1,7 +1,12 @@
 # utils/loader.py
 
 import os
+from concurrent.futures import ThreadPoolExecutor
+
+import numpy as np
 import pandas as pd
+import pyarrow as pa
+import pyarrow.parquet as pq
 import duckdb
 from utils.normalizer import normalize_columns
 
@@ -15,6 +20,7 @@ class GRDataLoader:
         self.lap_end = []
         self.laps = []
         self.telemetry = []
+        self._telemetry_jobs = []
         self.results = []
         self.weather = []
         self.sectors = []
@@ -39,8 +45,49 @@ class GRDataLoader:
                 if file.lower().endswith(".csv"):
                     self._load_single_file(os.path.join(track_path, file), track)
 
+        self._convert_telemetry()
         return self._combine()
 
+    # ---------------------------------------------------------
+    # Internal: telemetry CSV → parquet, all files in parallel
+    # ---------------------------------------------------------
+    def _convert_telemetry(self):
+        """
+        Run the telemetry COPY jobs queued by _load_single_file on a thread
+        pool. DuckDB releases the GIL while it executes, and every job uses
+        its own connection, so the conversions overlap.
+        """
+        if not self._telemetry_jobs:
+            return
+
+        print(f"\n➡️ TELEMETRY (DuckDB) — converting {len(self._telemetry_jobs)} files")
+
+        with ThreadPoolExecutor(max_workers=os.cpu_count() or 1) as pool:
+            futures = [
+                pool.submit(self._telemetry_to_parquet, path, track, out_parquet)
+                for path, track, out_parquet in self._telemetry_jobs
+            ]
+            # Results in discovery order, same as the serial loop
+            self.telemetry.extend(fut.result() for fut in futures)
+
+        self._telemetry_jobs = []
+
+    @staticmethod
+    def _telemetry_to_parquet(path, track, out_parquet):
+        con = duckdb.connect()
+        try:
+            con.execute(f"""
+                COPY (
+                    SELECT *, '{track}' AS track
+                    FROM read_csv_auto('{path}')
+                ) TO '{out_parquet}' (FORMAT 'parquet');
+            """)
+        finally:
+            con.close()
+
+        print(f"   ↳ {out_parquet}")
+        return out_parquet
+
     # ---------------------------------------------------------
     # Internal: clean semicolon-based sector CSVs
     # ---------------------------------------------------------
@@ -75,7 +122,7 @@ class GRDataLoader:
 
         # -------------------- Telemetry --------------------
         if "telemetry" in file_lower:
-            print("➡️ TELEMETRY (DuckDB)")
+            print("➡️ TELEMETRY (queued for DuckDB)")
 
             os.makedirs(self.processed_path, exist_ok=True)
             out_parquet = os.path.join(
@@ -83,14 +130,8 @@ class GRDataLoader:
                 f"telemetry_{track}_{os.path.basename(path)}.parquet",
             )
 
-            duckdb.query(f"""
-                COPY (
-                    SELECT *, '{track}' AS track
-                    FROM read_csv_auto('{path}')
-                ) TO '{out_parquet}' (FORMAT 'parquet');
-            """)
-
-            self.telemetry.append(out_parquet)
+            # Converted after the scan, in parallel (_convert_telemetry)
+            self._telemetry_jobs.append((path, track, out_parquet))
             return
 
         # -------------------- SECTORS -----------------------
@@ -172,6 +213,30 @@ class GRDataLoader:
             "bestlaps": safe_concat(self.bestlaps),
         }
 
+    # ---------------------------------------------------------
+    # Per-track sector summary (mean/min/max), one row per sector
+    # ---------------------------------------------------------
+    @staticmethod
+    def build_sector_summary(sectors):
+        sec_cols = ["s1_seconds", "s2_seconds", "s3_seconds"]
+        if sectors.empty or not all(c in sectors.columns for c in ["track"] + sec_cols):
+            return pd.DataFrame()
+
+        summary = (
+            sectors[["track"] + sec_cols]
+            .melt(id_vars="track", var_name="sector", value_name="seconds")
+            .groupby(["track", "sector"])["seconds"]
+            .agg(["mean", "min", "max"])
+            .round(3)
+            .reset_index()
+        )
+        summary["sector"] = summary["sector"].map({
+            "s1_seconds": "Sector 1",
+            "s2_seconds": "Sector 2",
+            "s3_seconds": "Sector 3",
+        })
+        return summary
+
     # ---------------------------------------------------------
     # Save to parquet
     # ---------------------------------------------------------
@@ -183,11 +248,42 @@ class GRDataLoader:
                 print(f"💾 Telemetry saved as {len(df)} parquet file(s)")
                 continue
 
-            df = df.copy()
-            for col in df.columns:
-                if df[col].dtype == "object":
-                    df[col] = df[col].astype(str)
+            # Mixed-type object columns → str (pyarrow can't infer them).
+            # Only those columns are rebuilt; the rest of the frame is
+            # not copied.
+            casts = {
+                col: df[col].astype(str)
+                for col in df.select_dtypes(include="object").columns
+            }
+
+            # Dictionary-encode track: readers get a categorical, so track
+            # equality / groupby compares int codes instead of strings
+            if "track" in df.columns:
+                casts["track"] = casts.get("track", df["track"]).astype("category")
+
+            if casts:
+                df = df.assign(**casts)
 
             path = os.path.join(self.processed_path, f"{name}.parquet")
-            df.to_parquet(path, index=False)
+
+            # One row group per track: a filtered read on track then
+            # only decodes that track's row group (min == max == track)
+            if "track" in df.columns and not df.empty:
+                df = df.sort_values("track", kind="stable")
+                self._write_by_track(df, path)
+            else:
+                df.to_parquet(path, index=False, compression="zstd")
             print(f"💾 Saved {name}: {len(df)} rows -> {path}")
+
+    @staticmethod
+    def _write_by_track(df, path):
+        table = pa.Table.from_pandas(df, preserve_index=False)
+        tracks = df["track"].to_numpy()
+
+        # df is sorted by track, so each track is one contiguous slice
+        starts = np.flatnonzero(np.r_[True, tracks[1:] != tracks[:-1]])
+        ends = np.r_[starts[1:], len(tracks)]
+
+        with pq.ParquetWriter(path, table.schema, compression="zstd") as writer:
+            for start, end in zip(starts, ends):
+                writer.write_table(table.slice(start, end - start))
@@ -27,6 +27,10 @@ COLUMN_MAP = {
     ],
 }
 
+# Inverted once at import: "CANDIDATE_UPPER" -> target. Later targets win
+# on a clash, as they did in the old per-target loop.
+_INVERSE_MAP = {c.upper(): target for target, cands in COLUMN_MAP.items() for c in cands}
+
 
 def normalize_columns(df: pd.DataFrame) -> pd.DataFrame:
     """
@@ -34,14 +38,10 @@ def normalize_columns(df: pd.DataFrame) -> pd.DataFrame:
     where possible, and clean basic formatting.
     """
     rename_map = {}
-
-    upper_candidates = {k: [c.upper() for c in v] for k, v in COLUMN_MAP.items()}
-
     for col in df.columns:
-        col_upper = col.strip().upper()
-        for target, candidates in upper_candidates.items():
-            if col_upper in candidates:
-                rename_map[col] = target
+        target = _INVERSE_MAP.get(col.strip().upper())
+        if target is not None:
+            rename_map[col] = target
 
     df = df.rename(columns=rename_map)
 
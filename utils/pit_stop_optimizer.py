@@ -135,35 +135,21 @@ def build_pit_scenarios(sectors_df, track, car_number, total_race_laps, default_
     pit_loss = estimate_pit_loss(car_df, default_pit_loss_s)
 
     # ------------ Simulation ------------ #
+    # One (stops × laps) matrix: row k is the stop on lap stops[k], where
+    # tyre age resets after the stop and the pit loss lands on that lap
     laps = np.arange(1, total_race_laps + 1)
     base = a + b * laps
+    stops = np.arange(2, total_race_laps - 1)
 
-    scenario_rows = []
-
-    for stop_lap in range(2, total_race_laps - 1):
-        stint_times = []
-        for lap in laps:
-            if lap > stop_lap:
-                age = lap - stop_lap
-            else:
-                age = lap
-            stint_times.append(a + b * age)
-
-        total_time = np.sum(stint_times) + pit_loss
-
-        for lap in laps:
-            scenario_rows.append({
-                "lap": lap,
-                "type": f"pit@{stop_lap}",
-                "time_s": stint_times[lap - 1] if lap != stop_lap else stint_times[lap - 1] + pit_loss
-            })
-
-    # baseline
-    for lap, lt in zip(laps, base):
-        scenario_rows.append({
-            "lap": lap,
-            "type": "baseline",
-            "time_s": float(lt)
-        })
-
-    return pd.DataFrame(scenario_rows)
+    age = np.where(laps[None, :] > stops[:, None], laps[None, :] - stops[:, None], laps[None, :])
+    stint_times = a + b * age
+    stint_times[np.arange(stops.size), stops - 1] += pit_loss
+
+    scenarios = pd.DataFrame({
+        "lap": np.tile(laps, stops.size),
+        "type": np.repeat([f"pit@{stop_lap}" for stop_lap in stops], laps.size),
+        "time_s": stint_times.ravel(),
+    })
+    baseline = pd.DataFrame({"lap": laps, "type": "baseline", "time_s": base})
+
+    return pd.concat([scenarios, baseline], ignore_index=True)